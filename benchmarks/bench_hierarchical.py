@@ -0,0 +1,50 @@
+import time
+import numpy as np
+from maps.grid_planner import GridPlanner
+from maps.hierarchical import HierarchicalPlanner
+from benchmarks.bench_jps import open_plan, timed
+
+
+def run(queries=20, seed=0):
+    rng = np.random.default_rng(seed)
+    print(f"{'map':>10} {'build ms':>9} {'astar ms':>9} {'hpa ms':>9} {'len ratio':>9} "
+          f"{'failed':>7} {'edit ms':>9} {'rebuilt':>8}")
+    for size, blocks in ((250, 40), (500, 120), (1000, 400)):
+        passable = open_plan(size, size, blocks, seed)
+        build_time, hpa = timed(HierarchicalPlanner, passable, 16)
+        astar = GridPlanner(passable)
+        free = np.argwhere(passable)
+        astar_time = hpa_time = 0.0
+        ratios = []
+        failed = 0
+        for _ in range(queries):
+            start = tuple(int(v) for v in free[rng.integers(len(free))])
+            goal = tuple(int(v) for v in free[rng.integers(len(free))])
+            t, reference = timed(astar.find_path, start, goal)
+            astar_time += t
+            t, path = timed(hpa.find_path, start, goal)
+            hpa_time += t
+            if len(reference) > 1:
+                # A route A* finds but HPA* does not is a failure, not a ratio
+                if not path:
+                    failed += 1
+                else:
+                    ratios.append((len(path) - 1) / (len(reference) - 1))
+
+        # A wall appearing in one spot should only touch a handful of clusters
+        edited = passable.copy()
+        r, c = free[len(free) // 2]
+        edited[r:r + 4, c:c + 4] = False
+        rebuilt = hpa.clusters_rebuilt
+        t0 = time.perf_counter()
+        hpa.set_floor(0, edited)
+        edit_time = time.perf_counter() - t0
+        rebuilt = hpa.clusters_rebuilt - rebuilt
+
+        print(f"{f'open {size}':>10} {build_time * 1000:>9.0f} {astar_time / queries * 1000:>9.1f} "
+              f"{hpa_time / queries * 1000:>9.1f} {np.mean(ratios):>9.3f} "
+              f"{failed:>7} {edit_time * 1000:>9.1f} {rebuilt:>8}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,93 @@
+import heapq
+import math
+import time
+import numpy as np
+from maps.indoor_map import IndoorMap
+from maps.grid_planner import GridPlanner
+from maps.jump_point import JumpPointPlanner, SQRT2
+
+
+def octile_astar(passable, start, goal):
+    # Plain 8-connected A* without corner cutting, the reference for 'jps8'
+    rows, cols = passable.shape
+    frontier = [(0.0, start)]
+    cost = {start: 0.0}
+    closed = set()
+    expanded = 0
+    while frontier:
+        _, current = heapq.heappop(frontier)
+        if current in closed:
+            continue
+        if current == goal:
+            return cost[current], expanded
+        closed.add(current)
+        expanded += 1
+        r, c = current
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if not (dr or dc):
+                    continue
+                nr, nc = r + dr, c + dc
+                if not (0 <= nr < rows and 0 <= nc < cols) or not passable[nr, nc]:
+                    continue
+                if dr and dc and not (passable[r, nc] and passable[nr, c]):
+                    continue
+                new_cost = cost[current] + (SQRT2 if dr and dc else 1)
+                if new_cost < cost.get((nr, nc), math.inf):
+                    cost[(nr, nc)] = new_cost
+                    h_r, h_c = abs(goal[0] - nr), abs(goal[1] - nc)
+                    h = (SQRT2 - 1) * min(h_r, h_c) + max(h_r, h_c)
+                    heapq.heappush(frontier, (new_cost + h, (nr, nc)))
+    return None, expanded
+
+
+def open_plan(rows, cols, blocks, seed=0):
+    # Border walls plus random rectangular obstacles (shelving, pillars)
+    rng = np.random.default_rng(seed)
+    passable = np.ones((rows, cols), dtype=bool)
+    passable[0, :] = passable[-1, :] = False
+    passable[:, 0] = passable[:, -1] = False
+    for _ in range(blocks):
+        h, w = rng.integers(2, max(3, rows // 8)), rng.integers(2, max(3, cols // 8))
+        r, c = rng.integers(1, rows - h), rng.integers(1, cols - w)
+        passable[r:r + h, c:c + w] = False
+    passable[1:4, 1:4] = True
+    passable[-4:-1, -4:-1] = True
+    return passable
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - t0, result
+
+
+def run():
+    default = IndoorMap()
+    maps = [('default', default.passable_mask(), (5, 5), (default.rows - 3, default.cols - 3))]
+    for size, blocks in ((250, 40), (500, 120), (1000, 400)):
+        maps.append((f"open {size}", open_plan(size, size, blocks), (2, 2), (size - 3, size - 3)))
+
+    print(f"{'map':>10} {'planner':>7} {'cost':>9} {'expanded':>9} {'ms':>9} {'ok':>4}")
+    for name, passable, start, goal in maps:
+        astar = GridPlanner(passable)
+        t, path = timed(astar.find_path, start, goal)
+        ref4 = len(path) - 1
+        print(f"{name:>10} {'astar':>7} {ref4:>9} {astar.expanded:>9} {t * 1000:>9.1f}")
+
+        jps = JumpPointPlanner(passable)
+        t, path = timed(jps.find_path, start, goal)
+        print(f"{name:>10} {'jps':>7} {len(path) - 1:>9} {jps.expanded:>9} {t * 1000:>9.1f} "
+              f"{str(len(path) - 1 == ref4):>4}")
+
+        t, (ref8, expanded) = timed(octile_astar, passable, start, goal)
+        print(f"{name:>10} {'astar8':>7} {ref8:>9.2f} {expanded:>9} {t * 1000:>9.1f}")
+
+        jps8 = JumpPointPlanner(passable, diagonal=True)
+        t, path = timed(jps8.find_path, start, goal)
+        print(f"{name:>10} {'jps8':>7} {jps8.cost:>9.2f} {jps8.expanded:>9} {t * 1000:>9.1f} "
+              f"{str(abs(jps8.cost - ref8) < 1e-6):>4}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,124 @@
+import contextlib
+import io
+import math
+import os
+import tempfile
+import time
+import numpy as np
+import pygame
+from maps.indoor_map import IndoorMap, OCCUPIED
+from maps.map_io import load_map, save_map
+from maps.occupancy_mapper import OccupancyMapper
+from gui.map_renderer import MapRenderer
+from gui.indoor_map_gui import IndoorMapGUI
+from sim import FakeStationServer, SimulatedRobot
+
+# Headless: must be set before pygame initialises the display
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+
+def per_call_us(func, repeats):
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - t0) / repeats * 1e6
+
+
+def update_costs(length=75, width=90, resolution=0.2, repeats=200):
+    """Mapper update cost and what one edit costs the renderer and planner."""
+    indoor_map = IndoorMap(length, width, resolution)
+    indoor_map.enable_costmap(robot_radius=0.15, inflation_radius=0.5)
+    mapper = OccupancyMapper(indoor_map)
+    rng = np.random.default_rng(0)
+    free = np.argwhere(indoor_map.occupancy == 0) * resolution
+    points = free[rng.integers(0, len(free), repeats)]
+    it = iter(range(10 ** 9))
+
+    def footprint():
+        y, x = points[next(it) % repeats]
+        mapper.observe_free(x, y)
+
+    def ray():
+        y, x = points[next(it) % repeats]
+        mapper.observe_ray(x, y, x + 3.0, y + 2.0, hit=False)
+
+    print(f"map {length}x{width} m, {indoor_map.rows * indoor_map.cols} cells")
+    print(f"  footprint update       {per_call_us(footprint, repeats):8.1f} us")
+    print(f"  3.6 m range ray        {per_call_us(ray, repeats):8.1f} us")
+
+    pygame.init()
+    screen = pygame.Surface((indoor_map.cols * 4, indoor_map.rows * 4))
+    renderer = MapRenderer(screen, indoor_map, 4)
+    indoor_map.occupancy_listeners.append(renderer.cells_changed)
+    renderer.build_background()
+    rebuild = per_call_us(renderer.build_background, 5)
+    start = indoor_map.current_location
+    goal = (indoor_map.rows - 6, indoor_map.cols - 6)
+    path = indoor_map.replan(start, goal)
+    r, c = path[len(path) // 2]
+    t0 = time.perf_counter()
+    mapper.observe_obstacle(c * resolution, r * resolution)
+    patch = renderer.patch_background()
+    patch_us = (time.perf_counter() - t0) * 1e6
+    print(f"  bump + background patch {patch_us:7.1f} us ({len(patch)} cells), "
+          f"full rebuild {rebuild:.0f} us")
+    t_repair = time.perf_counter()
+    indoor_map.replan(start, goal)
+    t_repair = time.perf_counter() - t_repair
+    t_fresh = time.perf_counter()
+    indoor_map.find_path(start, goal)
+    t_fresh = time.perf_counter() - t_fresh
+    print(f"  D* repair after it     {t_repair * 1000:8.1f} ms (A* on the rebuilt grid {t_fresh * 1000:.1f} ms)")
+    pygame.quit()
+
+
+def pallet_run(time_scale=50, timeout=60):
+    """Drive to a POI past a barrier that is missing from the robot's map."""
+    with tempfile.TemporaryDirectory() as directory:
+        indoor_map = IndoorMap()
+        indoor_map.poi_locations = {'1': (indoor_map.rows - 6, indoor_map.cols - 6)}
+        map_path = os.path.join(directory, "floor.yaml")
+        save_map(indoor_map, map_path, image='npy')
+        world = load_map(map_path)
+        rows, cols = world.occupancy.shape
+        # Across the bottom aisle the planner takes on the known map
+        world.occupancy[rows - 35:rows - 1, cols // 2 - 15:cols // 2 - 12] = OCCUPIED
+        world.mark_occupancy_changed()
+        goal = world.poi_locations['1']
+        server = FakeStationServer(station='1').start()
+        robot = SimulatedRobot(world, time_scale=time_scale, seed=0)
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            gui = IndoorMapGUI(map_path, robot=robot, station_url=server.url, headless=True)
+        gui.command_mode = 'segment'  # the simulator speaks the framed protocol
+        try:
+            deadline = time.monotonic() + 5
+            while gui.station_poller.latest_station is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            with contextlib.redirect_stdout(log):
+                gui.toggle_autonomous_mode()
+                start_sim = robot.sim_time()
+                t0 = time.perf_counter()
+                while gui.autonomous_mode and time.perf_counter() - t0 < timeout:
+                    gui.step()
+                wall = time.perf_counter() - t0
+            reached = math.hypot(robot.x - goal[1] * world.resolution,
+                                 robot.y - goal[0] * world.resolution) <= gui.position_tolerance * 1.5
+            print(f"pallet run: reached {reached}, bumps {robot.bumps}, "
+                  f"map replans {gui.profiler.counters.get('map_replans', 0)}, "
+                  f"cells mapped {gui.mapper.cells_changed}, "
+                  f"cells redrawn {gui.renderer.cells_patched}, "
+                  f"sim {robot.sim_time() - start_sim:.1f} s, wall {wall:.2f} s")
+        finally:
+            with contextlib.redirect_stdout(log):
+                gui.close()
+            server.stop()
+
+
+def run():
+    update_costs()
+    pallet_run()
+
+
+if __name__ == "__main__":
+    run()
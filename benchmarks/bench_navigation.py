@@ -0,0 +1,104 @@
+import contextlib
+import io
+import math
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from maps.indoor_map import IndoorMap
+from maps.map_io import load_map, save_map
+from gui.indoor_map_gui import IndoorMapGUI
+from sim import FakeStationServer, SimulatedRobot
+
+
+def timed(func, *args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - t0, result
+
+
+def navigate(map_path, time_scale, timeout):
+    """Drive the simulated robot to the map's only POI; returns the stats row."""
+    world = load_map(map_path)
+    goal = next(iter(world.poi_locations.values()))
+    server = FakeStationServer(station=next(iter(world.poi_locations))).start()
+    robot = SimulatedRobot(world, time_scale=time_scale, seed=0)
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        gui = IndoorMapGUI(map_path, robot=robot, station_url=server.url, headless=True)
+    gui.command_mode = 'segment'  # the simulator speaks the framed protocol
+    try:
+        astar_time, path = timed(gui.find_path, gui.current_location, goal)
+        deadline = time.monotonic() + 5
+        while gui.station_poller.latest_station is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        with contextlib.redirect_stdout(log):
+            plan_time, _ = timed(gui.toggle_autonomous_mode)
+            start_sim = robot.sim_time()
+            t0 = time.perf_counter()
+            iterations = 0
+            while gui.autonomous_mode and time.perf_counter() - t0 < timeout:
+                gui.step()
+                iterations += 1
+            wall = time.perf_counter() - t0
+        # The GUI stops as soon as its estimate is within position_tolerance,
+        # so the true pose ends up near that edge give or take odometry noise
+        error = math.hypot(robot.x - goal[1] * world.resolution,
+                           robot.y - goal[0] * world.resolution)
+        reached = error <= gui.position_tolerance * 1.5
+        return {
+            'cells': world.rows * world.cols,
+            'path': len(path) - 1,
+            'astar_ms': astar_time * 1000,
+            'plan_ms': plan_time * 1000,
+            'loop_hz': iterations / wall,
+            'sim_s': robot.sim_time() - start_sim,
+            'wall_s': wall,
+            'reached': reached,
+            'error_cm': error * 100,
+            'bumps': robot.bumps,
+        }
+    finally:
+        with contextlib.redirect_stdout(log):
+            gui.close()
+        server.stop()
+
+
+def navigate_isolated(map_path, time_scale, timeout):
+    """``navigate`` in a fresh process, adding that process's peak RSS.
+
+    ru_maxrss only ever grows, so measured in one process every row would
+    also carry the peak of the larger maps run before it.
+    """
+    # Keeps each child's pygame banner out of the table
+    os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(_navigate_measured, (map_path, time_scale, timeout))
+
+
+def _navigate_measured(map_path, time_scale, timeout):
+    stats = navigate(map_path, time_scale, timeout)
+    stats['max_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return stats
+
+
+def run(sizes=((25, 30), (50, 60), (75, 90)), resolution=0.2, time_scale=50, timeout=60):
+    print(f"{'map m':>7} {'cells':>7} {'path':>5} {'A* ms':>7} {'plan ms':>8} {'loop/s':>8} "
+          f"{'to goal s':>9} {'wall s':>7} {'err cm':>6} {'ok':>4} {'bumps':>5} {'max RSS MB':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for length, width in sizes:
+            indoor_map = IndoorMap(length, width, resolution)
+            indoor_map.poi_locations = {'1': (indoor_map.rows - 6, indoor_map.cols - 6)}
+            map_path = os.path.join(directory, f"floor_{length}x{width}.yaml")
+            save_map(indoor_map, map_path, image='npy')
+            stats = navigate_isolated(map_path, time_scale, timeout)
+            print(f"{f'{length}x{width}':>7} {stats['cells']:>7} {stats['path']:>5} "
+                  f"{stats['astar_ms']:>7.1f} {stats['plan_ms']:>8.1f} {stats['loop_hz']:>8.0f} "
+                  f"{stats['sim_s']:>9.1f} {stats['wall_s']:>7.2f} {stats['error_cm']:>6.1f} "
+                  f"{str(stats['reached']):>4} {stats['bumps']:>5} {stats['max_rss_mb']:>10.0f}")
+
+
+if __name__ == "__main__":
+    run()
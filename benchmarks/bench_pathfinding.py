@@ -0,0 +1,62 @@
+import heapq
+import time
+from maps.indoor_map import IndoorMap
+
+
+def legacy_find_path(indoor_map, start, end):
+    # Tuple/dict based A* that IndoorMap.find_path used before GridPlanner
+    frontier = []
+    heapq.heappush(frontier, (0, start))
+    came_from = {start: None}
+    cost_so_far = {start: 0}
+
+    while frontier:
+        current = heapq.heappop(frontier)[1]
+
+        if current == end:
+            break
+
+        for next_pos in indoor_map.get_neighbors(current):
+            new_cost = cost_so_far[current] + 1
+            if next_pos not in cost_so_far or new_cost < cost_so_far[next_pos]:
+                cost_so_far[next_pos] = new_cost
+                priority = new_cost + indoor_map.heuristic(end, next_pos)
+                heapq.heappush(frontier, (priority, next_pos))
+                came_from[next_pos] = current
+
+    path = []
+    current = end
+    while current != start:
+        path.append(current)
+        current = came_from[current]
+    path.append(start)
+    path.reverse()
+    return path
+
+
+def time_call(func, *args, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def run(resolutions=(0.2, 0.1, 0.05)):
+    print(f"{'resolution':>10} {'grid':>11} {'legacy ms':>10} {'engine ms':>10} {'speedup':>8} {'same':>5}")
+    for resolution in resolutions:
+        indoor_map = IndoorMap(resolution=resolution)
+        start = (1, 1)
+        end = (indoor_map.rows - 2, indoor_map.cols - 2)
+        legacy_time, legacy_path = time_call(legacy_find_path, indoor_map, start, end)
+        engine_time, engine_path = time_call(indoor_map.find_path, start, end)
+        grid = f"{indoor_map.rows}x{indoor_map.cols}"
+        print(f"{resolution:>10} {grid:>11} {legacy_time * 1000:>10.1f} "
+              f"{engine_time * 1000:>10.1f} {legacy_time / engine_time:>7.1f}x "
+              f"{str(legacy_path == engine_path):>5}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,47 @@
+import os
+import time
+
+# Headless: must be set before pygame initialises the display
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from maps.indoor_map import IndoorMap
+from gui.map_renderer import MapRenderer
+
+
+def frame_times(draw, indoor_map, path, frames):
+    times = []
+    for k in range(frames):
+        indoor_map.update_current_location(path[k % len(path)])
+        t0 = time.perf_counter()
+        draw(path)
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    return times
+
+
+def run(configs=((0.2, 10), (0.1, 5), (0.05, 2)), frames=60):
+    pygame.init()
+    print(f"{'resolution':>10} {'grid':>9} {'mode':>7} {'mean ms':>8} {'p95 ms':>7} {'max fps':>8}")
+    for resolution, cell_size in configs:
+        indoor_map = IndoorMap(resolution=resolution)
+        screen = pygame.display.set_mode((indoor_map.cols * cell_size,
+                                          indoor_map.rows * cell_size))
+        path = indoor_map.find_path(indoor_map.current_location,
+                                    (indoor_map.rows - 3, indoor_map.cols - 3))
+        for mode in ('full', 'cached'):
+            renderer = MapRenderer(screen, indoor_map, cell_size)
+            draw = renderer.draw if mode == 'cached' else renderer.draw_full
+            # Warm-up frame builds the background in cached mode
+            frame_times(draw, indoor_map, path, 1)
+            times = frame_times(draw, indoor_map, path, frames)
+            mean = sum(times) / len(times)
+            p95 = times[int(len(times) * 0.95) - 1]
+            grid = f"{indoor_map.rows}x{indoor_map.cols}"
+            print(f"{resolution:>10} {grid:>9} {mode:>7} {mean * 1000:>8.2f} "
+                  f"{p95 * 1000:>7.2f} {1 / mean:>8.0f}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,3 @@
+from .station_poller import StationPoller
+from .motion_protocol import CommandEncoder, decode_command
+from .serial_transport import SerialTransport, discover_port
\ No newline at end of file
@@ -0,0 +1,65 @@
+import os
+import select
+import threading
+import tty
+from .motion_protocol import decode_command
+
+
+class FakeArduino:
+    """Pseudo-terminal stand-in for the Arduino firmware (POSIX only).
+
+    Open a ``SerialTransport`` on ``port``. Framed commands are decoded and
+    acknowledged with ``#<seq>K`` (unless ``ack`` is False or ``delay``
+    holds the replies back), bare single-character commands are recorded
+    as they are, and ``report`` injects lines from the device side.
+    """
+
+    def __init__(self, ack=True, delay=0.0):
+        self.ack = ack
+        self.delay = delay
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.received = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='fake-arduino', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        buffer = b''
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self.master], [], [], 0.05)
+            if not ready:
+                continue
+            try:
+                buffer += os.read(self.master, 1024)
+            except OSError:
+                return
+            while buffer:
+                if buffer[:1] != b'#':
+                    self.received.append(buffer[:1].decode(errors='replace'))
+                    buffer = buffer[1:]
+                    continue
+                end = buffer.find(b'\n')
+                if end < 0:
+                    break
+                command = decode_command(buffer[:end])
+                buffer = buffer[end + 1:]
+                if command is None:
+                    continue
+                self.received.append(command)
+                if self.ack:
+                    if self.delay:
+                        self._stop.wait(self.delay)
+                    self.report(f"#{command.seq:02X}K\n")
+
+    def report(self, line):
+        if isinstance(line, str):
+            line = line.encode()
+        os.write(self.master, line)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(1.0)
+        os.close(self.master)
+        os.close(self.slave)
@@ -0,0 +1,65 @@
+from collections import namedtuple
+
+DIRECTION_CODES = {
+    'UP': 'F',
+    'DOWN': 'B',
+    'LEFT': 'L',
+    'RIGHT': 'R',
+    'STOP': 'S'
+}
+
+MotionCommand = namedtuple('MotionCommand', ['seq', 'code', 'args'])
+
+# Reports from the robot, framed like commands. Both carry the offset in mm
+# (map x, y) from the robot to what it found: 'O' a bumper contact, 'D' a
+# range reading whose ray up to that point is clear.
+OBSTACLE_CODE = 'O'
+RANGE_CODE = 'D'
+
+
+class CommandEncoder:
+    """Batched motion commands: one line per straight segment.
+
+    Frame layout is ``#`` + two hex digits of sequence number + a command
+    code + comma separated integer arguments + ``\\n``, e.g. ``#0AF1200\\n``
+    for "forward 1200 mm" or ``#0BV-350,900\\n`` for a vector move of
+    (-350, 900) mm in map x/y. Sequence numbers wrap at 256 and let the
+    Arduino acknowledge or reject individual segments.
+    """
+
+    def __init__(self):
+        self.seq = 0
+
+    def _next_seq(self):
+        seq = self.seq
+        self.seq = (self.seq + 1) % 256
+        return seq
+
+    def encode(self, code, *args):
+        seq = self._next_seq()
+        payload = ','.join(str(int(round(arg))) for arg in args)
+        return seq, f"#{seq:02X}{code}{payload}\n".encode()
+
+    def encode_move(self, direction, distance_mm=0):
+        code = DIRECTION_CODES[direction]
+        if code == 'S':
+            return self.encode(code)
+        return self.encode(code, distance_mm)
+
+    def encode_vector(self, dx_mm, dy_mm):
+        return self.encode('V', dx_mm, dy_mm)
+
+
+def decode_command(line):
+    """Parse one encoded line back into a MotionCommand, or None if malformed."""
+    if isinstance(line, (bytes, bytearray)):
+        line = line.decode(errors='replace')
+    line = line.strip()
+    if len(line) < 4 or line[0] != '#':
+        return None
+    try:
+        seq = int(line[1:3], 16)
+        args = tuple(int(arg) for arg in line[4:].split(',') if arg)
+    except ValueError:
+        return None
+    return MotionCommand(seq, line[3], args)
@@ -0,0 +1,234 @@
+import threading
+import time
+from collections import deque
+import queue
+import serial
+from serial.tools import list_ports
+from .motion_protocol import decode_command
+
+# USB vendor ids of Arduino boards and the usual USB-serial bridges on clones
+ARDUINO_VIDS = {0x2341, 0x2A03, 0x1A86, 0x0403, 0x10C4}
+
+ACK_CODE = 'K'
+NAK_CODE = 'E'
+HEARTBEAT_CODE = 'H'
+
+
+def discover_port(preferred=None):
+    """Pick the Arduino serial port.
+
+    ``preferred`` wins if given (a device path or a pyserial URL such as
+    ``loop://``); otherwise the first port that looks like an Arduino.
+    """
+    if preferred:
+        return preferred
+    for port in list_ports.comports():
+        description = f"{port.description} {port.manufacturer or ''}".lower()
+        if port.vid in ARDUINO_VIDS or 'arduino' in description:
+            return port.device
+    return None
+
+
+class SerialTransport:
+    """Threaded serial link to the Arduino.
+
+    ``send``/``write`` only enqueue, so the caller never waits on the port.
+    A writer thread drains a bounded queue (oldest commands are dropped when
+    it overflows and consecutive commands with the same ``key`` are merged,
+    unless sent with ``force``), and a reader thread parses replies. Frames sent with a sequence number
+    are expected to be acknowledged with ``#<seq>K``; if ``ack_timeout``
+    passes without one, or no line at all arrives for that long while
+    heartbeats are enabled, the transport sends ``stop_frame`` on its own
+    and sets ``link_lost``. Lines that are not acknowledgements end up in
+    ``incoming``.
+    """
+
+    def __init__(self, port=None, baudrate=9600, queue_size=32, ack_timeout=None,
+                 heartbeat_interval=None, stop_frame=b'S', encoder=None):
+        self.port = port
+        self.baudrate = baudrate
+        self.queue_size = queue_size
+        self.ack_timeout = ack_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.stop_frame = stop_frame
+        self.encoder = encoder
+        self.serial = None
+        self.commands = deque()
+        self.incoming = queue.Queue()
+        self.pending = {}
+        self.last_key = None
+        self.last_received = None
+        self.last_sent = None
+        self.link_lost = False
+        self.dropped = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.acked = 0
+        self._lock = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def open(self):
+        port = discover_port(self.port)
+        if port is None:
+            raise serial.SerialException("No Arduino serial port found")
+        self.serial = serial.serial_for_url(port, self.baudrate, timeout=0.05,
+                                            write_timeout=1)
+        self.port = port
+        self.last_received = time.monotonic()
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._write_loop, name='serial-writer', daemon=True),
+            threading.Thread(target=self._read_loop, name='serial-reader', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def close(self, flush_timeout=0.5):
+        # Give queued commands (typically a final STOP) a chance to go out
+        deadline = time.monotonic() + flush_timeout
+        while self.commands and self._threads and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self._stop.set()
+        with self._lock:
+            self._lock.notify_all()
+        for thread in self._threads:
+            thread.join(1.0)
+        self._threads = []
+        if self.serial is not None:
+            self.serial.close()
+            self.serial = None
+
+    def __bool__(self):
+        return self.serial is not None
+
+    def send(self, frame, seq=None, key=None, force=False):
+        # force: always goes out, e.g. to repeat a command the robot
+        # stopped short on, which would otherwise merge with the last one
+        with self._lock:
+            if force:
+                self.last_key = None
+            elif key is not None:
+                if self.commands and self.commands[-1][2] == key:
+                    self.commands[-1] = (frame, seq, key)
+                    self.coalesced += 1
+                    return
+                if not self.commands and self.last_key == key and not self.pending:
+                    self.coalesced += 1
+                    return
+            if len(self.commands) >= self.queue_size:
+                self.commands.popleft()
+                self.dropped += 1
+            self.commands.append((frame, seq, key))
+            self._lock.notify()
+
+    def write(self, data):
+        # Drop-in for serial.Serial.write, but queued
+        self.send(bytes(data))
+        return len(data)
+
+    def send_stop(self):
+        # Jumps the queue: anything still waiting is obsolete
+        with self._lock:
+            self.dropped += len(self.commands)
+            self.commands.clear()
+            self.commands.append((self.stop_frame, None, None))
+            # The robot is standing still, so the next motion must go out
+            # even if it repeats the last one
+            self.last_key = None
+            self._lock.notify()
+
+    def _next_command(self, timeout):
+        with self._lock:
+            if not self.commands:
+                self._lock.wait(timeout)
+            if self.commands:
+                return self.commands.popleft()
+        return None
+
+    def _write_loop(self):
+        wait = 0.05 if self.ack_timeout or self.heartbeat_interval else 0.5
+        while not self._stop.is_set():
+            command = self._next_command(wait)
+            now = time.monotonic()
+            if command is not None:
+                frame, seq, key = command
+                self._write(frame, seq, now)
+                self.last_key = key
+            elif self.heartbeat_interval and self.encoder is not None:
+                if self.last_sent is None or now - self.last_sent >= self.heartbeat_interval:
+                    seq, frame = self.encoder.encode(HEARTBEAT_CODE)
+                    self._write(frame, seq, now)
+            self._check_link(now)
+
+    def _write(self, frame, seq, now):
+        # Registered before the write: the reader may see the ACK before
+        # write() even returns
+        tracked = seq is not None and self.ack_timeout
+        if tracked:
+            self.pending[seq] = now
+        try:
+            self.serial.write(frame)
+        except (serial.SerialException, OSError) as e:
+            if tracked:
+                self.pending.pop(seq, None)
+            print(f"Error sending command to Arduino: {e}")
+            return
+        self.sent += 1
+        self.last_sent = now
+
+    def _check_link(self, now):
+        if not self.ack_timeout or self.link_lost:
+            return
+        overdue = any(now - sent_at > self.ack_timeout for sent_at in list(self.pending.values()))
+        silent = (self.heartbeat_interval is not None
+                  and now - self.last_received > self.ack_timeout)
+        if overdue or silent:
+            self.link_lost = True
+            self.pending.clear()
+            with self._lock:
+                self.dropped += len(self.commands)
+                self.commands.clear()
+                self.last_key = None
+            print("Arduino did not acknowledge in time, sending STOP")
+            self._write(self.stop_frame, None, now)
+
+    def _read_loop(self):
+        # readline() gives up at the port timeout and returns whatever part
+        # of a line had arrived, so bytes are collected here and only
+        # complete, newline-terminated lines are handled
+        buffer = bytearray()
+        while not self._stop.is_set():
+            try:
+                chunk = self.serial.read(self.serial.in_waiting or 1)
+            except (serial.SerialException, OSError, TypeError, AttributeError):
+                if self._stop.is_set():
+                    return
+                time.sleep(0.05)
+                continue
+            if not chunk:
+                continue
+            self.last_received = time.monotonic()
+            buffer += chunk
+            while True:
+                end = buffer.find(b'\n')
+                if end < 0:
+                    break
+                line = bytes(buffer[:end + 1])
+                del buffer[:end + 1]
+                self._handle_line(line)
+
+    def _handle_line(self, line):
+        command = decode_command(line)
+        if command is not None and command.code in (ACK_CODE, NAK_CODE):
+            if self.pending.pop(command.seq, None) is not None:
+                self.acked += command.code == ACK_CODE
+            self.link_lost = False
+            if command.code == NAK_CODE:
+                self.incoming.put(line)
+        elif command is not None and command.code == HEARTBEAT_CODE:
+            self.pending.pop(command.seq, None)
+            self.link_lost = False
+        else:
+            self.incoming.put(line)
@@ -0,0 +1,106 @@
+import queue
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_URL = 'http://localhost:8080/available'
+
+
+class StationPoller:
+    """Polls the station server on a background thread.
+
+    Uses one keep-alive ``requests.Session``, backs off exponentially while
+    the server is failing and puts the station id on ``updates`` only when
+    it changes, so the GUI loop never waits on the network. With
+    ``long_poll`` the request carries ``wait``/``last`` parameters and the
+    next request is sent as soon as the server answers, for servers that
+    hold the response until the station changes.
+    """
+
+    def __init__(self, url=DEFAULT_URL, interval=1.0, timeout=2.0,
+                 max_backoff=30.0, long_poll=False, long_poll_wait=25.0):
+        self.url = url
+        self.interval = interval
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.long_poll = long_poll
+        self.long_poll_wait = long_poll_wait
+        self.updates = queue.Queue()
+        self.latest_station = None
+        self.failures = 0
+        self.requests_sent = 0
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='station-poller',
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout if timeout is not None else self.timeout + 1)
+            self._thread = None
+        self.session.close()
+
+    def refresh(self):
+        # Skip the rest of the current wait and poll right away
+        self._wake.set()
+
+    def get_update(self):
+        """Return the newest station change since the last call, or None."""
+        station = None
+        while True:
+            try:
+                station = self.updates.get_nowait()
+            except queue.Empty:
+                return station
+
+    def fetch_once(self):
+        params = None
+        timeout = self.timeout
+        if self.long_poll:
+            params = {'wait': self.long_poll_wait, 'last': self.latest_station}
+            timeout = self.timeout + self.long_poll_wait
+        self.requests_sent += 1
+        response = self.session.get(self.url, params=params, timeout=timeout)
+        if response.status_code != 200:
+            raise requests.exceptions.HTTPError(
+                f"Server returned status code: {response.status_code}")
+        data = response.json()
+        if not isinstance(data, dict):
+            raise ValueError(f"Unexpected response body: {data!r}")
+        return str(data.get('station'))
+
+    def next_delay(self):
+        if self.failures:
+            return min(self.max_backoff, self.interval * 2 ** self.failures)
+        if self.long_poll:
+            return 0
+        return self.interval
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                station = self.fetch_once()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                self.failures += 1
+                print(f"Server communication error in POI check: {e} "
+                      f"(retry in {self.next_delay():.1f}s)")
+            else:
+                self.failures = 0
+                if station != self.latest_station:
+                    self.latest_station = station
+                    self.updates.put(station)
+            self._wake.wait(self.next_delay())
+            self._wake.clear()
@@ -1 +1,2 @@
-from .indoor_map_gui import IndoorMapGUI
\ No newline at end of file
+from .indoor_map_gui import IndoorMapGUI
+from .map_renderer import MapRenderer
\ No newline at end of file
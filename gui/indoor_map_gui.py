@@ -1,17 +1,45 @@
+import numpy as np
 import pygame
+import queue
+import threading
 import time
-import requests
-import serial
-from maps.indoor_map import IndoorMap
+import os
+from collections import namedtuple
+from maps.indoor_map import IndoorMap, FREE
+from maps.map_io import read_map
+from maps.occupancy_mapper import OccupancyMapper
 from sensors.mouse_sensor import MouseSensor
+from sensors.odometry_reader import OdometryReader
+from sensors.pose_estimator import PoseEstimator
+from comms.station_poller import StationPoller, DEFAULT_URL
+from comms.motion_protocol import (CommandEncoder, DIRECTION_CODES, OBSTACLE_CODE, RANGE_CODE,
+                                   decode_command)
+from comms.serial_transport import SerialTransport
+from maps.path_smoothing import corner_indices, line_of_sight_indices
+from utils.profiler import StageProfiler
+from utils.rate_loop import FixedRateLoop
+from telemetry.recorder import TelemetryRecorder
+from .map_renderer import MapRenderer
+
+# What the renderer needs from one control tick; rebuilt, never mutated
+ControlState = namedtuple('ControlState', ['tick', 'current_location', 'active_pois',
+                                           'path', 'autonomous_mode'])
 
 class IndoorMapGUI(IndoorMap):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, map_path=None, robot=None, station_url=DEFAULT_URL, headless=False):
+        # robot: e.g. a sim.SimulatedRobot, used as both the Arduino link and
+        # the mouse; headless: draw to an offscreen surface, no window
+        map_path = map_path or os.environ.get('ROBOMAP_MAP')  # None: built-in demo floor
+        self.map_path = os.path.abspath(map_path) if map_path else None
+        super().__init__(**(read_map(map_path) if map_path else {}))
+        self.enable_costmap(robot_radius=0.15, inflation_radius=0.5)
+        if headless:
+            # Must be set before pygame initialises the display
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
         pygame.init()
         self.CELL_SIZE = 10
-        self.WIDTH = len(self.matrix[0]) * self.CELL_SIZE
-        self.HEIGHT = len(self.matrix) * self.CELL_SIZE
+        self.WIDTH = self.cols * self.CELL_SIZE
+        self.HEIGHT = self.rows * self.CELL_SIZE
         self.screen = pygame.display.set_mode((self.WIDTH, self.HEIGHT))
         pygame.display.set_caption("Indoor Map Navigation")
         self.WHITE = (255, 255, 255)
@@ -19,30 +47,109 @@ class IndoorMapGUI(IndoorMap):
         self.YELLOW = (255, 255, 0)
         self.GREEN = (0, 255, 0)
         self.BLUE = (0, 0, 255)
+        self.render_mode = 'cached'  # 'cached' (dirty rects) or 'full'
+        # Sensing and control run at control_rate on their own thread in
+        # run(); rendering follows at render_fps from published snapshots
+        self.control_rate = 100  # Hz
+        self.render_fps = 30
+        self.control_lock = threading.RLock()
+        self.control_loop = None
+        self.control_ticks = 0
+        self.control_state = None
+        self.frames_dropped = 0
+        # Per-stage loop timings; 'P' toggles the overlay, ROBOMAP_PROFILE_LOG
+        # names a file that gets a JSON summary line every 10 s
+        self.profiler = StageProfiler(budgets={'tick': 1 / self.control_rate,
+                                               'draw': 1 / self.render_fps},
+                                      export_path=os.environ.get('ROBOMAP_PROFILE_LOG'))
+        self.show_profile = False
+        self.verbose = True  # Per-iteration navigation prints
+        self.renderer = MapRenderer(self.screen, self, self.CELL_SIZE)
+        # Obstacles found while driving (bump and range reports from the
+        # Arduino) go into a log-odds layer over the static walls; edited
+        # cells are pushed to the renderer and checked against the path
+        self.mapping = True
+        self.mapper = OccupancyMapper(self, robot_radius=0.15)
+        self.map_changes = 0
+        self.map_changes_checked = 0
+        self.bumped = False  # the robot stopped on contact and needs a new command
+        self.occupancy_listeners.append(self.renderer.cells_changed)
+        self.occupancy_listeners.append(self.cells_changed)
         self.autonomous_mode = False
         self.target_poi = None
         self.current_path = []
         self.path_index = 0
+        # 'step': one bare direction letter per cell, which any firmware
+        # understands; 'segment': one framed command (CommandEncoder) per
+        # straight run, only for firmware that speaks the framed protocol
+        self.command_mode = os.environ.get('ROBOMAP_COMMAND_MODE', 'step')
+        self.any_angle = False  # Line-of-sight smoothing, sends vector moves
+        self.command_encoder = CommandEncoder()
+        self.waypoint_indices = []
+        self.sent_waypoint = None
+        # A command counts as stalled after this many control ticks without
+        # a single odometry report while the waypoint is still out of reach
+        self.stall_ticks = 50
+        self.stalled_ticks = 0
+        self.progress_frames = 0
+        self.corrections = 0
         self.arduino = None
-        self.connect_arduino()
-        self.mouse_sensor = MouseSensor()
+        self.serial_port = os.environ.get('ROBOMAP_SERIAL_PORT')  # None: auto-detect
+        self.serial_ack_timeout = None  # seconds; set when the firmware sends ACKs
+        if robot is None:
+            self.connect_arduino()
+            self.mouse_sensor = MouseSensor()
+        else:
+            self.arduino = robot
+            self.mouse_sensor = robot
+        # ROBOMAP_TELEMETRY names a directory for a binary log of the run
+        # (frames, poses, paths, commands, POI changes, map edits); see
+        # telemetry.replay
+        self.recorder = None
+        telemetry_dir = os.environ.get('ROBOMAP_TELEMETRY')
+        if telemetry_dir:
+            self.recorder = TelemetryRecorder(telemetry_dir, meta={
+                'map_path': self.map_path,
+                'resolution': self.resolution,
+                'shape': [self.rows, self.cols],
+                'start': list(self.current_location),
+                'pois': sorted(self.poi_locations),
+                'counts_per_mm': self.mouse_sensor.counts_per_mm,
+                'costmap': {'robot_radius': 0.15, 'inflation_radius': 0.5},
+                'planner': 'replan',  # what produced the recorded paths
+            })
+        # Drains the USB endpoint continuously so no motion report is lost;
+        # ROBOMAP_FRAME_LOG names a file for the raw reports
+        self.odometry = OdometryReader(self.mouse_sensor, recorder=self.recorder,
+                                       frame_log=os.environ.get('ROBOMAP_FRAME_LOG')).start()
+        self.last_odometry_frames = 0
+        self.last_odometry_totals = (0, 0)
         self.start_row, self.start_col = self.current_location
+        # Float pose; current_location is only its snapped cell for planning
+        counts_per_mm = self.mouse_sensor.counts_per_mm
+        self.pose = PoseEstimator(self.resolution, self.current_location,
+                                  counts_per_mm=(counts_per_mm, counts_per_mm))
         self.active_server_poi = None  # Track active POI from server
         self.last_sensor_update = time.time()
         self.position_tolerance = 0.1  # meters
-        self.update_interval = 0.1  # seconds
-        self.last_poi_check = time.time()  # Initialize with current time
+        self.update_interval = 0.0  # seconds; the control rate already paces reads
         self.poi_check_interval = 1.0  # Check POI every 1 second
         self.last_known_poi = None
+        # Server I/O runs on its own thread; run() only drains its queue
+        self.station_poller = StationPoller(station_url, interval=self.poi_check_interval)
+        self.station_poller.start()
 
     def connect_arduino(self):
         try:
-            self.arduino = serial.Serial('COM6', 9600, timeout=1)
-            print("Connected to Arduino on COM6")
+            self.arduino = SerialTransport(self.serial_port, 9600,
+                                           ack_timeout=self.serial_ack_timeout,
+                                           encoder=self.command_encoder).open()
+            print(f"Connected to Arduino on {self.arduino.port}")
         except Exception as e:
+            self.arduino = None
             print(f"Error connecting to Arduino: {e}")
 
-    def send_movement_command(self, direction):
+    def send_movement_command(self, direction, force=False):
         if not self.arduino:
             return
         try:
@@ -55,12 +162,75 @@ class IndoorMapGUI(IndoorMap):
             }
             if direction in commands:
                 command = commands[direction]
-                self.arduino.write(command.encode())
+                # Queued on the serial thread; repeats of one direction merge
+                # unless forced
+                if direction == 'STOP':
+                    self.arduino.send_stop()
+                else:
+                    self.arduino.send(command.encode(), key=direction, force=force)
+                if self.recorder is not None:
+                    self.recorder.record_command(command)
+                if self.verbose:
+                    timestamp = time.strftime("%H:%M:%S")
+                    print(f"[{timestamp}] Sent Arduino command: {direction} ({command})")
+        except Exception as e:
+            print(f"Error sending command to Arduino: {e}")
+
+    def send_segment_command(self, segment_start, target_pos, from_pose=False):
+        # from_pose: always a vector move from the current pose, e.g. to
+        # correct a segment that ended short of (or past) its waypoint
+        if not self.arduino:
+            return
+        try:
+            # Straight segments go out as one axis move, unless the robot is
+            # off the segment's line (e.g. stopped by a bump on a cell edge);
+            # then a vector move takes it to the waypoint's centre
+            if from_pose:
+                off_line = None
+            elif segment_start[1] == target_pos[1]:
+                off_line = abs(target_pos[1] * self.resolution - self.pose.x)
+            elif segment_start[0] == target_pos[0]:
+                off_line = abs(target_pos[0] * self.resolution - self.pose.y)
+            else:
+                off_line = None
+            if off_line is not None and off_line <= self.position_tolerance / 2:
+                direction = self.calculate_direction(segment_start, target_pos)
+                distance_mm = self.pose.distance_to_cell(target_pos) * 1000
+                seq, frame = self.command_encoder.encode_move(direction, distance_mm)
+                code, x, y = DIRECTION_CODES[direction], distance_mm, 0.0
+            else:
+                dx_mm = (target_pos[1] * self.resolution - self.pose.x) * 1000
+                dy_mm = (target_pos[0] * self.resolution - self.pose.y) * 1000
+                seq, frame = self.command_encoder.encode_vector(dx_mm, dy_mm)
+                code, x, y = 'V', dx_mm, dy_mm
+            self.arduino.send(frame, seq=seq)
+            if self.recorder is not None:
+                self.recorder.record_command(code, seq, x, y)
+            if self.verbose:
                 timestamp = time.strftime("%H:%M:%S")
-                print(f"[{timestamp}] Sent Arduino command: {direction} ({command})")
+                print(f"[{timestamp}] Sent Arduino segment {seq}: {frame.decode().strip()}")
         except Exception as e:
             print(f"Error sending command to Arduino: {e}")
 
+    def set_path(self, path):
+        self.current_path = path
+        if self.recorder is not None:
+            self.recorder.record_path(path)
+        self.path_index = 0
+        self.sent_waypoint = None
+        if self.any_angle:
+            self.waypoint_indices = line_of_sight_indices(path, self.planning_mask())
+        else:
+            self.waypoint_indices = corner_indices(path)
+
+    def next_waypoint_index(self):
+        if self.command_mode == 'step':
+            return self.path_index + 1
+        for index in self.waypoint_indices:
+            if index > self.path_index:
+                return index
+        return len(self.current_path) - 1
+
     def calculate_direction(self, current_pos, next_pos):
         curr_row, curr_col = current_pos
         next_row, next_col = next_pos
@@ -74,72 +244,47 @@ class IndoorMapGUI(IndoorMap):
             return 'RIGHT'
         return 'STOP'
 
-    def draw_map(self, path=None):
-        self.screen.fill(self.WHITE)
-        for i in range(len(self.matrix)):
-            for j in range(len(self.matrix[0])):
-                rect = pygame.Rect(
-                    j * self.CELL_SIZE, 
-                    i * self.CELL_SIZE, 
-                    self.CELL_SIZE, 
-                    self.CELL_SIZE
-                )
-                if self.matrix[i][j] == 1:
-                    pygame.draw.rect(self.screen, self.BLACK, rect)
-                elif self.matrix[i][j] == 2:
-                    pygame.draw.rect(self.screen, self.GREEN, rect)
-                elif self.matrix[i][j] == 3:
-                    pygame.draw.rect(self.screen, self.YELLOW, rect)
-                pygame.draw.rect(self.screen, self.BLACK, rect, 1)
-        if path:
-            for i in range(len(path) - 1):
-                start_pos = (
-                    path[i][1] * self.CELL_SIZE + self.CELL_SIZE // 2,
-                    path[i][0] * self.CELL_SIZE + self.CELL_SIZE // 2
-                )
-                end_pos = (
-                    path[i + 1][1] * self.CELL_SIZE + self.CELL_SIZE // 2,
-                    path[i + 1][0] * self.CELL_SIZE + self.CELL_SIZE // 2
-                )
-                pygame.draw.line(self.screen, self.BLUE, start_pos, end_pos, 4)
-        pygame.display.flip()
+    def direction_from_pose(self, target_pos):
+        # Along the larger remaining offset from the continuous pose; the
+        # snapped cell says STOP once it matches the target, even while the
+        # pose is still out of tolerance across the cell
+        dx = target_pos[1] * self.resolution - self.pose.x
+        dy = target_pos[0] * self.resolution - self.pose.y
+        if abs(dx) >= abs(dy):
+            return 'RIGHT' if dx > 0 else 'LEFT'
+        return 'DOWN' if dy > 0 else 'UP'
+
+    def draw_map(self, path=None, state=None):
+        if self.render_mode == 'cached':
+            self.renderer.draw(path, state)
+        else:
+            self.renderer.draw_full(path)
 
     def find_nearest_poi(self, current_pos):
-        min_distance = float('inf')
-        nearest_poi = None
-        for i in range(self.rows):
-            for j in range(self.cols):
-                if self.matrix[i][j] == 2:
-                    dist = self.heuristic(current_pos, (i, j))
-                    if dist < min_distance:
-                        min_distance = dist
-                        nearest_poi = (i, j)
-        return nearest_poi
+        # Rank the active POIs by wall-aware distance
+        nearest_poi, _ = self.nearest_poi_by_distance(current_pos, self.active_pois)
+        if nearest_poi is None:
+            return None
+        return self.poi_locations[nearest_poi]
 
     def fetch_pois_from_server(self):
-        try:
-            response = requests.get('http://localhost:8080/available')
-            if response.status_code == 200:
-                data = response.json()
-                active_poi = str(data.get('station'))
-                for i in range(self.rows):
-                    for j in range(self.cols):
-                        if self.matrix[i][j] == 2:
-                            self.matrix[i][j] = 0
-                if active_poi in self.poi_locations:
-                    location = self.poi_locations[active_poi]
-                    self.matrix[location[0]][location[1]] = 2
-                    print(f"POI {active_poi} is now active at location {location}")
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching POIs: {e}")
+        # Applies the poller's latest answer and asks it to poll again now
+        self.station_poller.refresh()
+        active_poi = self.station_poller.latest_station
+        if active_poi is None:
+            print("No POI received from server yet")
+            return
+        self.set_active_pois([active_poi])
+        self.record_poi(active_poi)
+        if active_poi in self.poi_locations:
+            location = self.poi_locations[active_poi]
+            print(f"POI {active_poi} is now active at location {location}")
 
     def check_if_on_poi(self):
-        row, col = self.current_location
-        if self.matrix[row][col] == 2:
-            for poi_num, location in self.poi_locations.items():
-                if location == (row, col):
-                    print(f"Reached POI {poi_num}!")
-                    return True
+        poi_num = self.poi_at(self.current_location)
+        if poi_num is not None:
+            print(f"Reached POI {poi_num}!")
+            return True
         return False
 
     def get_cell_from_mouse(self, mouse_pos):
@@ -156,35 +301,64 @@ class IndoorMapGUI(IndoorMap):
             self.stop_movement()
             return False
 
-        # Get next target position
-        next_pos = self.current_path[self.path_index + 1]
+        # Get next target position (end of the current straight segment)
+        next_index = self.next_waypoint_index()
+        next_pos = self.current_path[next_index]
         
         # Print current navigation state
-        print(f"\n[AUTONOMOUS] Current position: {self.current_location}")
-        print(f"[AUTONOMOUS] Target position: {next_pos}")
-        print(f"[AUTONOMOUS] Progress: {self.path_index + 1}/{len(self.current_path)}")
+        if self.verbose:
+            print(f"\n[AUTONOMOUS] Current position: {self.current_location}")
+            print(f"[AUTONOMOUS] Target position: {next_pos}")
+            print(f"[AUTONOMOUS] Progress: {self.path_index + 1}/{len(self.current_path)}")
         
         # Update current position from sensor
         position_updated = self.update_position_from_sensor()
+        frames = self.odometry.snapshot().frames
+        if frames != self.progress_frames:
+            self.progress_frames = frames
+            self.stalled_ticks = 0
+        else:
+            self.stalled_ticks += 1
+        # Commands are open loop: if the robot stopped out of tolerance
+        # (odometry and firmware disagree on the distance), send it again
+        # from where the pose says it is
+        stalled = self.sent_waypoint == next_index and self.stalled_ticks >= self.stall_ticks
+        if stalled:
+            self.corrections += 1
+            self.stalled_ticks = 0
+            print(f"[AUTONOMOUS] Stopped short of {next_pos}, sending a correction")
         
-        if position_updated:
-            # Check if reached next position
-            if self.is_position_reached(next_pos):
-                self.path_index += 1
-                print(f"[AUTONOMOUS] Reached waypoint {self.path_index}")
-                if self.check_if_on_poi():
-                    print("[AUTONOMOUS] Destination POI reached!")
-                    self.stop_movement()
-                    return False
-            else:
-                # Calculate and send movement command
-                direction = self.calculate_direction(self.current_location, next_pos)
+        # Checked on every pass: the loop's own position update may already
+        # have consumed the last report. And a robot standing still produces
+        # no reports, so the first command for a waypoint must not wait for one.
+        if self.is_position_reached(next_pos):
+            self.path_index = next_index
+            print(f"[AUTONOMOUS] Reached waypoint {self.path_index}")
+            if self.check_if_on_poi():
+                print("[AUTONOMOUS] Destination POI reached!")
+                self.stop_movement()
+                return False
+        elif self.command_mode == 'segment':
+            # One write covers the whole segment; re-sent only for a new one
+            # or after a stall
+            if self.sent_waypoint != next_index or stalled:
+                segment_start = self.current_path[self.path_index]
+                self.send_segment_command(segment_start, next_pos, from_pose=stalled)
+                self.sent_waypoint = next_index
+                self.stalled_ticks = 0
+        elif position_updated or stalled or self.sent_waypoint != next_index:
+            # Calculate and send movement command
+            direction = self.direction_from_pose(next_pos)
+            if self.verbose:
                 timestamp = time.strftime("%H:%M:%S")
                 print(f"\n[{timestamp}] NAVIGATION:")
                 print(f"├── Current: {self.current_location}")
                 print(f"├── Target:  {next_pos}")
                 print(f"└── Command: {direction}")
-                self.send_movement_command(direction)
+            # A correction repeats the last direction; it must not merge away
+            self.send_movement_command(direction, force=stalled)
+            self.sent_waypoint = next_index
+            self.stalled_ticks = 0
         
         return True
 
@@ -193,35 +367,84 @@ class IndoorMapGUI(IndoorMap):
         if current_time - self.last_sensor_update < self.update_interval:
             return False
 
-        parsed_data = self.mouse_sensor.read_and_parse_data()
-        if parsed_data:
-            x_mm, y_mm = self.mouse_sensor.get_displacement_mm()
-            # Convert mm to grid cells (assuming resolution is in meters)
-            col_offset = int(x_mm / (self.resolution * 1000))
-            row_offset = int(y_mm / (self.resolution * 1000))
-            new_row = self.start_row + row_offset
-            new_col = self.start_col + col_offset
-            new_position = (new_row, new_col)
+        snapshot = self.odometry.snapshot()
+        if snapshot.frames != self.last_odometry_frames:
+            self.last_odometry_frames = snapshot.frames
+            last_x, last_y = self.last_odometry_totals
+            self.last_odometry_totals = (snapshot.x_total, snapshot.y_total)
+            self.pose.update_odometry(snapshot.x_total - last_x, snapshot.y_total - last_y)
+            new_row, new_col = self.pose.cell()
+            if self.mapping and (new_row, new_col) != self.current_location:
+                # Once per cell entered, so standing next to an obstacle does
+                # not keep wearing down the evidence for it
+                self.mapper.observe_free(self.pose.x, self.pose.y)
+            if self.recorder is not None:
+                self.recorder.record_pose((new_row, new_col), self.pose.x, self.pose.y)
             # Ensure new position is within bounds
             if 0 <= new_row < self.rows and 0 <= new_col < self.cols:
-                self.update_current_location(new_position)
+                self.update_current_location((new_row, new_col))
                 self.last_sensor_update = current_time
                 return True
         return False
 
+    def process_reports(self):
+        # Drains obstacle/range reports the Arduino link has queued; other
+        # lines (acknowledgements on links that pass them through) are skipped
+        incoming = getattr(self.arduino, 'incoming', None)
+        if incoming is None:
+            return
+        while True:
+            try:
+                line = incoming.get_nowait()
+            except queue.Empty:
+                return
+            report = decode_command(line)
+            if report is None or len(report.args) != 2 or not self.mapping:
+                continue
+            dx_mm, dy_mm = report.args
+            if report.code == OBSTACLE_CODE:
+                # The robot stops on the edge of the cell it ran into, where
+                # rounding the pose can land on either side. Only the side of
+                # the contact is trusted: the obstacle is the cell half a
+                # cell ahead, and the robot is in the one before it.
+                step_x = step_y = 0
+                if abs(dx_mm) >= abs(dy_mm):
+                    step_x = 1 if dx_mm > 0 else -1
+                else:
+                    step_y = 1 if dy_mm > 0 else -1
+                half = self.resolution / 2
+                row, col = self.mapper.cell(self.pose.x + step_x * half, self.pose.y + step_y * half)
+                print(f"Obstacle reported at {(row, col)}")
+                self.mapper.observe_obstacle(col * self.resolution, row * self.resolution)
+                robot_cell = (row - step_y, col - step_x)
+                if 0 <= robot_cell[0] < self.rows and 0 <= robot_cell[1] < self.cols:
+                    # The pose moves with it, or the next odometry update
+                    # would round it back into the obstacle cell
+                    self.pose.clamp_to_cell(robot_cell)
+                    self.update_current_location(robot_cell)
+                self.bumped = True
+            elif report.code == RANGE_CODE:
+                self.mapper.observe_ray(self.pose.x, self.pose.y,
+                                        self.pose.x + dx_mm / 1000, self.pose.y + dy_mm / 1000)
+
+    def cells_changed(self, rows, cols):
+        # Occupancy listener; the path itself is checked once per control tick
+        self.map_changes += 1
+        if self.recorder is not None:
+            self.recorder.record_cells(rows, cols, self.occupancy[rows, cols] != FREE)
+
+    def path_blocked(self):
+        # Whether the rest of the current path crosses a cell the robot can
+        # no longer use; paths the edits do not touch are kept as they are
+        remaining = self.current_path[self.path_index + 1:]
+        if not remaining:
+            return False
+        cells = np.asarray(remaining)
+        return not self.planning_mask()[cells[:, 0], cells[:, 1]].all()
+
     def is_position_reached(self, target_pos):
-        curr_row, curr_col = self.current_location
-        target_row, target_col = target_pos
-        
-        # Convert grid positions to meters
-        curr_x = curr_col * self.resolution
-        curr_y = curr_row * self.resolution
-        target_x = target_col * self.resolution
-        target_y = target_row * self.resolution
-        
-        # Check if within tolerance
-        distance = ((curr_x - target_x)**2 + (curr_y - target_y)**2)**0.5
-        return distance <= self.position_tolerance
+        # Measured from the continuous pose, not from the snapped cell
+        return self.pose.distance_to_cell(target_pos) <= self.position_tolerance
 
     def stop_movement(self):
         if self.arduino:
@@ -239,89 +462,66 @@ class IndoorMapGUI(IndoorMap):
 
     def start_autonomous_navigation(self):
         try:
-            print("Fetching POI from server...")
-            response = requests.get('http://localhost:8080/available', timeout=2)
-            if response.status_code == 200:
-                data = response.json()
-                active_poi = str(data.get('station'))
-                print(f"Server returned POI: {active_poi}")
-                
-                if active_poi and active_poi in self.poi_locations:
-                    target_location = self.poi_locations[active_poi]
-                    self.active_server_poi = active_poi
-                    self.last_known_poi = active_poi
-                    self.current_path = self.find_path(self.current_location, target_location)
-                    self.path_index = 0
-                    print(f"Path calculated to POI {active_poi} at {target_location}")
-                else:
-                    print(f"Invalid POI from server: {active_poi}")
-                    self.autonomous_mode = False
+            active_poi = self.station_poller.latest_station
+            if active_poi is None:
+                print("No POI received from server yet")
+                self.station_poller.refresh()
+                self.autonomous_mode = False
+                return
+            print(f"Server returned POI: {active_poi}")
+
+            if active_poi in self.poi_locations:
+                target_location = self.poi_locations[active_poi]
+                self.active_server_poi = active_poi
+                self.last_known_poi = active_poi
+                self.record_poi(active_poi)
+                self.set_path(self.replan(self.current_location, target_location))
+                print(f"Path calculated to POI {active_poi} at {target_location}")
             else:
-                print(f"Server returned status code: {response.status_code}")
+                print(f"Invalid POI from server: {active_poi}")
                 self.autonomous_mode = False
-        except requests.exceptions.RequestException as e:
-            print(f"Server communication error: {e}")
-            self.autonomous_mode = False
         except Exception as e:
             print(f"Unexpected error in autonomous navigation: {e}")
             self.autonomous_mode = False
 
     def stop_autonomous_navigation(self):
-        self.current_path = []
-        self.path_index = 0
+        self.set_path([])
         if self.arduino:
             self.send_movement_command('STOP')
         print("Stopping autonomous navigation")
 
     def check_and_update_poi(self):
-        current_time = time.time()
-        if current_time - self.last_poi_check < self.poi_check_interval:
-            return False
+        # Non-blocking: only looks at changes the poller has already queued
+        active_poi = self.station_poller.get_update()
+        if active_poi is not None and active_poi != self.last_known_poi:
+            print(f"POI changed from {self.last_known_poi} to {active_poi}")
+            self.last_known_poi = active_poi
 
-        self.last_poi_check = current_time  # Update timestamp before request
-        
-        try:
-            print("Checking for POI updates...")
-            response = requests.get('http://localhost:8080/available', timeout=2)
-            if response.status_code == 200:
-                data = response.json()
-                active_poi = str(data.get('station'))
-                print(f"Current active POI: {active_poi}")
-                
-                if active_poi != self.last_known_poi:
-                    print(f"POI changed from {self.last_known_poi} to {active_poi}")
-                    self.last_known_poi = active_poi
-                    
-                    # Update map and navigation
-                    self._update_poi_on_map(active_poi)
-                    return True
-        
-        except requests.exceptions.RequestException as e:
-            print(f"Server communication error in POI check: {e}")
-        
+            # Update map and navigation
+            self._update_poi_on_map(active_poi)
+            return True
         return False
 
     def _update_poi_on_map(self, active_poi):
-        # Clear old POIs
-        for i in range(self.rows):
-            for j in range(self.cols):
-                if self.matrix[i][j] == 2:
-                    self.matrix[i][j] = 0
-        
-        # Set new active POI
+        # Replaces the previously active POIs
+        self.set_active_pois([active_poi])
+        self.record_poi(active_poi)
         if active_poi in self.poi_locations:
             location = self.poi_locations[active_poi]
-            self.matrix[location[0]][location[1]] = 2
             print(f"Updated map with POI {active_poi} at {location}")
             
             # Update navigation if in autonomous mode
             if self.autonomous_mode:
-                self.current_path = self.find_path(self.current_location, location)
-                self.path_index = 0
+                self.set_path(self.replan(self.current_location, location))
                 print("Recalculated path for new POI")
 
+    def record_poi(self, poi):
+        if self.recorder is not None and poi in self.poi_locations:
+            self.recorder.record_poi(poi, self.poi_locations[poi])
+
     def run(self):
         clock = pygame.time.Clock()
+        self.start_control_loop()
         running = True
         while running:
             for event in pygame.event.get():
@@ -329,29 +529,102 @@ class IndoorMapGUI(IndoorMap):
                     running = False
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_a:
-                        self.toggle_autonomous_mode()
-            
-            # Regular position update
-            self.update_position_from_sensor()
-            
-            # Check for POI updates
-            poi_updated = self.check_and_update_poi()
-            
-            # Handle autonomous navigation
-            if self.autonomous_mode:
-                if poi_updated or not self.move_along_path():
-                    if self.last_known_poi in self.poi_locations:
-                        target = self.poi_locations[self.last_known_poi]
-                        self.current_path = self.find_path(self.current_location, target)
-                        self.path_index = 0
-            
-            # Draw current state
-            self.draw_map(self.current_path if self.autonomous_mode else None)
-            clock.tick(30)
+                        with self.control_lock:
+                            self.toggle_autonomous_mode()
+                    elif event.key == pygame.K_p:
+                        self.toggle_profile_overlay()
+            # Motor commands come first: skip the frame while control is late
+            if self.control_loop.lagging():
+                self.frames_dropped += 1
+                self.profiler.count('frames_dropped')
+            else:
+                self.render_frame()
+            clock.tick(self.render_fps)
         
         self.close()
 
+    def start_control_loop(self):
+        self.control_loop = FixedRateLoop(self.control_step, self.control_rate,
+                                          profiler=self.profiler, stage='tick')
+        self.control_loop.start()
+        return self.control_loop
+
+    def step(self):
+        # Control and rendering in lock-step on the calling thread, e.g. for
+        # a headless harness that drives the loop itself
+        with self.profiler.stage('tick'):
+            self.control_step()
+        self.render_frame()
+
+    def control_step(self):
+        profiler = self.profiler
+        with self.control_lock:
+            # Regular position update, then whatever the robot ran into
+            with profiler.stage('sensor'):
+                self.update_position_from_sensor()
+            with profiler.stage('mapping'):
+                self.process_reports()
+
+            # Check for POI updates
+            with profiler.stage('poi'):
+                poi_updated = self.check_and_update_poi()
+
+            # Handle autonomous navigation (includes any 'replan' time)
+            with profiler.stage('control'):
+                map_changed = self.map_changes != self.map_changes_checked
+                self.map_changes_checked = self.map_changes
+                bumped, self.bumped = self.bumped, False
+                if self.autonomous_mode and self.current_path and (
+                        bumped or map_changed and self.path_blocked()):
+                    print("[AUTONOMOUS] Path blocked by a mapped obstacle, replanning")
+                    profiler.count('map_replans')
+                    target = self.current_path[-1]
+                    self.set_path(self.replan(self.current_location, target))
+                if self.autonomous_mode:
+                    if poi_updated or not self.move_along_path():
+                        if self.last_known_poi in self.poi_locations:
+                            target = self.poi_locations[self.last_known_poi]
+                            self.set_path(self.replan(self.current_location, target))
+
+            self.control_ticks += 1
+            # set_path swaps in a new list and never edits one in place, so
+            # the snapshot can share it
+            self.control_state = ControlState(self.control_ticks, self.current_location,
+                                              frozenset(self.active_pois), self.current_path,
+                                              self.autonomous_mode)
+
+    def render_frame(self):
+        state = self.control_state
+        if state is None:
+            return
+        with self.profiler.stage('draw'):
+            self.draw_map(state.path if state.autonomous_mode else None, state)
+            if self.show_profile:
+                self.renderer.draw_text_box(self.profiler.report_lines())
+        self.profiler.maybe_export()
+
+    def replan(self, start, end):
+        with self.profiler.stage('replan'):
+            path = super().replan(start, end)
+        self.profiler.count('replans')
+        self.profiler.count('expanded', self.incremental_planner.expanded)
+        return path
+
+    def toggle_profile_overlay(self):
+        self.show_profile = not self.show_profile
+        if not self.show_profile:
+            self.renderer.clear_text_box()
+
     def close(self):
+        if self.control_loop is not None:
+            self.control_loop.stop()
+        self.station_poller.stop()
+        self.odometry.stop()
+        if self.arduino:
+            self.send_movement_command('STOP')
+            self.arduino.close()
+        if self.recorder is not None:
+            self.recorder.close()
         if self.mouse_sensor:
             self.mouse_sensor.close()
         pygame.quit()
\ No newline at end of file
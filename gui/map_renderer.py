@@ -0,0 +1,220 @@
+from collections import deque
+import numpy as np
+import pygame
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+YELLOW = (255, 255, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+PATH_WIDTH = 4
+
+
+class MapRenderer:
+    """Draws an IndoorMap from a cached background plus a few overlay items.
+
+    Walls and grid lines are rendered once into ``background`` with
+    ``pygame.surfarray`` and rebuilt only when ``occupancy_version`` changes.
+    Each frame the POI cells, the robot cell and the path segments are
+    compared with the previous frame, and only the rectangles covered by
+    items that appeared or disappeared are restored and pushed to the
+    display. Registered as an occupancy listener (``cells_changed``), it
+    patches just the edited cells into the background instead of
+    rebuilding it.
+    """
+
+    def __init__(self, screen, indoor_map, cell_size):
+        self.screen = screen
+        self.indoor_map = indoor_map
+        self.cell_size = cell_size
+        self.background = None
+        self.background_version = None
+        self.items = {}
+        self.frames = 0
+        self.updated_pixels = 0
+        self.font = None
+        self.text_rect = None
+        self.changed_cells = deque()
+        self.cells_patched = 0
+
+    def build_background(self):
+        cs = self.cell_size
+        occupancy = self.indoor_map.occupancy
+        rows, cols = occupancy.shape
+        # surfarray is indexed [x, y], i.e. [col, row]
+        walls = np.repeat(np.repeat(occupancy.T != 0, cs, axis=0), cs, axis=1)
+        pixels = np.full(walls.shape + (3,), 255, dtype=np.uint8)
+        pixels[walls] = BLACK
+        # One-pixel outline on every cell, like pygame.draw.rect(..., 1)
+        edge = np.zeros(cs, dtype=bool)
+        edge[0] = edge[-1] = True
+        pixels[np.tile(edge, cols), :, :] = 0
+        pixels[:, np.tile(edge, rows), :] = 0
+        surface = pygame.surfarray.make_surface(pixels)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        self.background = surface
+        self.background_version = self.indoor_map.occupancy_version
+
+    def cells_changed(self, rows, cols):
+        # May be called from the control thread: only queue the cells here,
+        # the next draw() patches them in
+        self.changed_cells.append((self.indoor_map.occupancy_version, rows, cols))
+
+    def patch_background(self):
+        # Applies queued edits that follow on from the background's version;
+        # after any gap draw() falls back to a full rebuild
+        patched = []
+        occupancy = self.indoor_map.occupancy
+        while self.changed_cells:
+            version, rows, cols = self.changed_cells.popleft()
+            if self.background is None or version != self.background_version + 1:
+                continue
+            for row, col in zip(rows.tolist(), cols.tolist()):
+                rect = self.cell_rect((row, col))
+                self.background.fill(BLACK if occupancy[row, col] else WHITE, rect)
+                pygame.draw.rect(self.background, BLACK, rect, 1)
+                patched.append(rect)
+            self.background_version = version
+        self.cells_patched += len(patched)
+        return patched
+
+    def cell_rect(self, pos):
+        cs = self.cell_size
+        return pygame.Rect(pos[1] * cs, pos[0] * cs, cs, cs)
+
+    def cell_center(self, pos):
+        cs = self.cell_size
+        return (pos[1] * cs + cs // 2, pos[0] * cs + cs // 2)
+
+    def overlay_items(self, path, state=None):
+        # Ordered like the full redraw: POI cells, robot cell, path on top.
+        # state: anything with current_location/active_pois, e.g. a control
+        # snapshot, read instead of the live map
+        items = {}
+        indoor_map = self.indoor_map
+        state = indoor_map if state is None else state
+        for poi_num in sorted(state.active_pois):
+            location = tuple(indoor_map.poi_locations[poi_num])
+            items[('cell', location, GREEN)] = self.cell_rect(location)
+        robot = tuple(state.current_location)
+        items.pop(('cell', robot, GREEN), None)
+        items[('cell', robot, YELLOW)] = self.cell_rect(robot)
+        if path:
+            pad = PATH_WIDTH
+            for i in range(len(path) - 1):
+                start = self.cell_center(path[i])
+                end = self.cell_center(path[i + 1])
+                left = min(start[0], end[0]) - pad
+                top = min(start[1], end[1]) - pad
+                rect = pygame.Rect(left, top,
+                                   abs(start[0] - end[0]) + 2 * pad + 1,
+                                   abs(start[1] - end[1]) + 2 * pad + 1)
+                items[('line', start, end)] = rect
+        return items
+
+    def draw_item(self, key):
+        if key[0] == 'cell':
+            rect = self.cell_rect(key[1])
+            pygame.draw.rect(self.screen, key[2], rect)
+            pygame.draw.rect(self.screen, BLACK, rect, 1)
+        else:
+            pygame.draw.line(self.screen, BLUE, key[1], key[2], PATH_WIDTH)
+
+    def draw(self, path=None, state=None):
+        """Redraw what changed since the last frame and return the dirty rects."""
+        patched = self.patch_background()
+        if self.background_version != self.indoor_map.occupancy_version:
+            self.build_background()
+            self.items = {}
+            full_redraw = True
+        else:
+            full_redraw = self.frames == 0
+        self.frames += 1
+
+        items = self.overlay_items(path, state)
+        if full_redraw:
+            self.screen.blit(self.background, (0, 0))
+            for key in items:
+                self.draw_item(key)
+            self.items = items
+            pygame.display.flip()
+            self.updated_pixels += self.screen.get_width() * self.screen.get_height()
+            return [self.screen.get_rect()]
+
+        old_items = self.items
+        dirty = [rect for key, rect in old_items.items() if key not in items]
+        dirty.extend(rect for key, rect in items.items() if key not in old_items)
+        dirty.extend(patched)
+        self.items = items
+        if not dirty:
+            return []
+
+        self.restore(dirty)
+        pygame.display.update(dirty)
+        self.updated_pixels += sum(rect.width * rect.height for rect in dirty)
+        return dirty
+
+    def restore(self, dirty):
+        # Background plus whichever current items overlap each rect
+        keys = list(self.items)
+        rects = list(self.items.values())
+        for rect in dirty:
+            self.screen.set_clip(rect)
+            self.screen.blit(self.background, rect, rect)
+            for index in sorted(rect.collidelistall(rects)):
+                self.draw_item(keys[index])
+        self.screen.set_clip(None)
+
+    def draw_text_box(self, lines, pos=(4, 4)):
+        """Opaque text box on top of the map, redrawn every frame it is shown."""
+        if self.font is None:
+            self.font = pygame.font.Font(None, 18)
+        surfaces = [self.font.render(line, True, WHITE) for line in lines]
+        width = max((surface.get_width() for surface in surfaces), default=0) + 8
+        height = sum(surface.get_height() for surface in surfaces) + 8
+        rect = pygame.Rect(pos, (width, height))
+        dirty = [rect]
+        if self.text_rect is not None and not rect.contains(self.text_rect):
+            # The box shrank: uncover what the previous one hid
+            self.restore([self.text_rect])
+            dirty.append(self.text_rect)
+        self.screen.fill(BLACK, rect)
+        y = rect.top + 4
+        for surface in surfaces:
+            self.screen.blit(surface, (rect.left + 4, y))
+            y += surface.get_height()
+        self.text_rect = rect
+        pygame.display.update(dirty)
+
+    def clear_text_box(self):
+        if self.text_rect is not None:
+            self.restore([self.text_rect])
+            pygame.display.update([self.text_rect])
+            self.text_rect = None
+
+    def draw_full(self, path=None):
+        # Original per-cell renderer, kept for comparison and debugging
+        cs = self.cell_size
+        matrix = self.indoor_map.matrix
+        rows, cols = matrix.shape
+        self.screen.fill(WHITE)
+        for i in range(rows):
+            for j in range(cols):
+                rect = pygame.Rect(j * cs, i * cs, cs, cs)
+                if matrix[i, j] == 1:
+                    pygame.draw.rect(self.screen, BLACK, rect)
+                elif matrix[i, j] == 2:
+                    pygame.draw.rect(self.screen, GREEN, rect)
+                elif matrix[i, j] == 3:
+                    pygame.draw.rect(self.screen, YELLOW, rect)
+                pygame.draw.rect(self.screen, BLACK, rect, 1)
+        if path:
+            for i in range(len(path) - 1):
+                start_pos = self.cell_center(path[i])
+                end_pos = self.cell_center(path[i + 1])
+                pygame.draw.line(self.screen, BLUE, start_pos, end_pos, PATH_WIDTH)
+        pygame.display.flip()
+        self.frames += 1
+        self.updated_pixels += self.screen.get_width() * self.screen.get_height()
+        return [self.screen.get_rect()]
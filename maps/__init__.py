@@ -1 +1,10 @@
-from .indoor_map import IndoorMap
\ No newline at end of file
+from .indoor_map import IndoorMap
+from .grid_planner import GridPlanner
+from .dstar_lite import IncrementalPlanner
+from .route_cache import RouteCache
+from .jump_point import JumpPointPlanner
+from .hierarchical import HierarchicalPlanner
+from .map_io import load_map, save_map
+from .costmap import Costmap
+from .occupancy_mapper import OccupancyMapper
+from .batch_planner import BatchPlanner
\ No newline at end of file
@@ -0,0 +1,272 @@
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from .grid_planner import GridPlanner
+
+# Per-process state of a pool worker: the grid it last attached to
+_worker = {'name': None, 'shm': None, 'planner': None}
+
+
+def _attach(grid):
+    # grid = (shm name, rows, cols, has costs); re-attach only when the
+    # parent has published a new grid
+    name, rows, cols, has_costs = grid
+    if _worker['name'] != name:
+        if _worker['shm'] is not None:
+            _worker['shm'].close()
+        # Pool workers share the parent's resource tracker, so attaching
+        # here does not make the block outlive (or die with) this process
+        shm = shared_memory.SharedMemory(name=name)
+        passable, costs = _grid_views(shm, rows, cols, has_costs)
+        planner = GridPlanner(passable)
+        planner.set_costs(costs)
+        _worker.update(name=name, shm=shm, planner=planner)
+    return _worker['planner']
+
+
+def _grid_views(shm, rows, cols, has_costs):
+    cells = rows * cols
+    passable = np.ndarray((rows, cols), dtype=np.uint8, buffer=shm.buf)
+    costs = None
+    if has_costs:
+        offset = -(-cells // 8) * 8
+        costs = np.ndarray((rows, cols), dtype=np.int32, buffer=shm.buf, offset=offset)
+    return passable, costs
+
+
+def _path_cost(planner, path):
+    if not path:
+        return -1
+    if planner.extra_cost is None:
+        return len(path) - 1
+    extra = planner.extra_cost
+    return len(path) - 1 + sum(int(extra[r + 1, c + 1]) for r, c in path[1:])
+
+
+def _plan_chunk(grid, queries, use_heuristic, with_paths):
+    planner = _attach(grid) if isinstance(grid, tuple) else grid
+    results = []
+    for start, goal in queries:
+        path = planner.find_path(start, goal, use_heuristic)
+        results.append((path if with_paths else None, _path_cost(planner, path)))
+    return results
+
+
+def _field_chunk(grid, goals, starts):
+    # One reverse search per goal answers every start at once
+    planner = _attach(grid) if isinstance(grid, tuple) else grid
+    rows = [r for r, _ in starts]
+    cols = [c for _, c in starts]
+    return [planner.distance_field(goal)[rows, cols] for goal in goals]
+
+
+class BatchPlanner:
+    """Plans many (start, goal) queries on an ``IndoorMap`` at once.
+
+    The planning grid (and the costmap's step costs, if enabled) is copied
+    into one shared-memory block whenever the map's ``occupancy_version``
+    moves; workers of a process pool attach to it by name, so a task only
+    pickles its queries. ``workers=0`` plans in-process. ``cost_matrix``
+    scores every start against every goal with one distance field per goal
+    rather than a search per pair.
+    ``plan_cooperative`` is the reservation-table (cooperative A*) mode.
+    """
+
+    def __init__(self, indoor_map, workers=None, chunk_size=16):
+        self.indoor_map = indoor_map
+        self.workers = os.cpu_count() if workers is None else workers
+        self.chunk_size = chunk_size
+        self.pool = None
+        self.shm = None
+        self.grid = None
+        self.local_planner = None
+        self.version = None
+
+    def _publish(self):
+        indoor_map = self.indoor_map
+        if self.version == indoor_map.occupancy_version:
+            return
+        passable = indoor_map.planning_mask()
+        costs = None if indoor_map.costmap is None else indoor_map.costmap.step_cost
+        self.version = indoor_map.occupancy_version
+        if not self.workers:
+            if self.local_planner is None:
+                self.local_planner = GridPlanner(passable)
+            else:
+                self.local_planner.set_grid(passable)
+            self.local_planner.set_costs(costs)
+            self.grid = self.local_planner
+            return
+
+        rows, cols = passable.shape
+        size = -(-rows * cols // 8) * 8 + (rows * cols * 4 if costs is not None else 0)
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        try:
+            shared_passable, shared_costs = _grid_views(shm, rows, cols, costs is not None)
+            shared_passable[:] = passable
+            if costs is not None:
+                shared_costs[:] = costs
+        except BaseException:
+            shm.close()
+            shm.unlink()
+            raise
+        # Workers switch to the new block on their next task
+        self._release_shm()
+        self.shm = shm
+        self.grid = (shm.name, rows, cols, costs is not None)
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers)
+
+    def _release_shm(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def _in_bounds(self, cell):
+        return 0 <= cell[0] < self.indoor_map.rows and 0 <= cell[1] < self.indoor_map.cols
+
+    def _chunks(self, items):
+        return [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+
+    def _run(self, func, chunks, *args):
+        if not self.workers:
+            return [func(self.grid, chunk, *args) for chunk in chunks]
+        futures = [self.pool.submit(func, self.grid, chunk, *args) for chunk in chunks]
+        try:
+            return [future.result() for future in futures]
+        except BaseException:
+            # The caller may never get to close(); don't leave the block
+            # behind. The next call publishes a fresh one.
+            for future in futures:
+                future.cancel()
+            self._release_shm()
+            self.version = None
+            raise
+
+    def plan(self, queries, method='astar', with_paths=True):
+        """(path, cost) per query, in order; [] and -1 when unreachable."""
+        if method not in ('astar', 'dijkstra'):
+            raise ValueError(f"Unknown path planning method: {method}")
+        self._publish()
+        queries = [(tuple(start), tuple(goal)) for start, goal in queries]
+        # Off-grid queries are answered here rather than sent to a worker
+        valid = [i for i, (start, goal) in enumerate(queries)
+                 if self._in_bounds(start) and self._in_bounds(goal)]
+        results = [([] if with_paths else None, -1) for _ in queries]
+        planned = []
+        for chunk_results in self._run(_plan_chunk, self._chunks([queries[i] for i in valid]),
+                                       method == 'astar', with_paths):
+            planned.extend(chunk_results)
+        for i, result in zip(valid, planned):
+            results[i] = result
+        return results
+
+    def costs(self, queries):
+        return np.array([cost for _, cost in self.plan(queries, with_paths=False)], dtype=np.int64)
+
+    def cost_matrix(self, starts, goals):
+        """Costs from every start (rows) to every goal (columns), -1 if unreachable."""
+        self._publish()
+        starts = [tuple(start) for start in starts]
+        goals = [tuple(goal) for goal in goals]
+        matrix = np.full((len(starts), len(goals)), -1, dtype=np.int64)
+        # Off-grid cells stay -1; only the rest go to the workers
+        rows = [i for i, start in enumerate(starts) if self._in_bounds(start)]
+        columns = [j for j, goal in enumerate(goals) if self._in_bounds(goal)]
+        if not rows or not columns:
+            return matrix
+        fields = []
+        for chunk_fields in self._run(_field_chunk, self._chunks([goals[j] for j in columns]),
+                                      [starts[i] for i in rows]):
+            fields.extend(chunk_fields)
+        matrix[np.ix_(rows, columns)] = np.array(fields).T
+        return matrix
+
+    def plan_cooperative(self, queries, horizon=None):
+        """Conflict-free timed routes, planned one robot after another.
+
+        Each robot runs a space-time A* (moves and waits of one step) that
+        avoids the cells and swaps reserved by the robots before it, then
+        reserves its own route and stays parked on its goal. Queries earlier
+        in the list get priority. Returns one list of cells per robot,
+        indexed by time step, or [] where no route was found within
+        ``horizon`` steps (default: twice the free-space distance plus 64).
+        Step costs of a costmap are not used here, only its passable cells.
+        """
+        passable = self.indoor_map.planning_mask()
+        field_planner = GridPlanner(passable)
+        reserved = set()     # (cell, t)
+        moves = set()        # (from, to, t): the step taken between t and t + 1
+        busy_until = {}      # cell -> last step some robot is there
+        parked = {}          # cell -> step from which a robot stays there for good
+        routes = []
+        for start, goal in queries:
+            start, goal = tuple(start), tuple(goal)
+            field = field_planner.distance_field(goal)
+            if field[start] < 0:
+                routes.append([])
+                continue
+            limit = horizon if horizon is not None else 2 * int(field[start]) + 64
+            route = self._space_time_astar(start, goal, field, passable, reserved, moves,
+                                           busy_until, parked, limit)
+            routes.append(route)
+            for t, cell in enumerate(route):
+                reserved.add((cell, t))
+                busy_until[cell] = max(busy_until.get(cell, -1), t)
+                if t:
+                    moves.add((route[t - 1], cell, t - 1))
+            if route:
+                parked[goal] = len(route) - 1
+        return routes
+
+    def _space_time_astar(self, start, goal, field, passable, reserved, moves,
+                          busy_until, parked, limit):
+        rows, cols = passable.shape
+
+        def blocked(cell, t):
+            since = parked.get(cell)
+            return (cell, t) in reserved or (since is not None and t >= since)
+
+        if blocked(start, 0):
+            return []
+        frontier = [(int(field[start]), 0, start)]
+        parent = {(start, 0): None}
+        while frontier:
+            _, t, cell = heapq.heappop(frontier)
+            # Park only once nobody else will pass through the goal later on
+            if cell == goal and t > busy_until.get(goal, -1):
+                route = []
+                state = (cell, t)
+                while state is not None:
+                    route.append(state[0])
+                    state = parent[state]
+                route.reverse()
+                return route
+            if t >= limit:
+                continue
+            r, c = cell
+            for nxt in ((r, c), (r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                nr, nc = nxt
+                if not (0 <= nr < rows and 0 <= nc < cols) or not passable[nr, nc]:
+                    continue
+                if (nxt, t + 1) in parent or blocked(nxt, t + 1):
+                    continue
+                # Two robots may not swap cells in the same step
+                if (nxt, cell, t) in moves:
+                    continue
+                distance = int(field[nxt])
+                if distance < 0:
+                    continue
+                parent[(nxt, t + 1)] = (cell, t)
+                heapq.heappush(frontier, (t + 1 + distance, t + 1, nxt))
+        return []
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        self._release_shm()
+        self.version = None
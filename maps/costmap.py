@@ -0,0 +1,128 @@
+import math
+import numpy as np
+
+# Cell costs, map_server/costmap_2d style
+FREE_COST = 0
+INSCRIBED_COST = 253  # the robot's centre here means it touches a wall
+LETHAL_COST = 254     # a wall cell
+
+
+def footprint_radii(footprint):
+    """Inscribed and circumscribed radius of a polygon footprint (metres)."""
+    points = [tuple(point) for point in footprint]
+    circumscribed = max(math.hypot(x, y) for x, y in points)
+    inscribed = circumscribed
+    for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
+        dx, dy = x2 - x1, y2 - y1
+        length_sq = dx * dx + dy * dy
+        t = 0.0 if length_sq == 0 else max(0.0, min(1.0, -(x1 * dx + y1 * dy) / length_sq))
+        inscribed = min(inscribed, math.hypot(x1 + t * dx, y1 + t * dy))
+    return inscribed, circumscribed
+
+
+def distance_transform(occupied, max_distance):
+    """Euclidean distance in cells from each cell to the nearest occupied one.
+
+    Exact up to ``max_distance`` cells; anything farther (or with no
+    obstacle at all) comes back as ``max_distance + 1``. One vectorized
+    scan down the columns, then ``max_distance`` shifted minimums along
+    the rows, so the cost is O(cells * max_distance) without Python loops
+    over cells.
+    """
+    rows, cols = occupied.shape
+    cap = max_distance + 1
+    index = np.arange(rows, dtype=np.int32)[:, None]
+    above = np.where(occupied, index, -cap - rows)
+    np.maximum.accumulate(above, axis=0, out=above)
+    below = np.where(occupied, index, cap + rows)[::-1]
+    np.minimum.accumulate(below, axis=0, out=below)
+    vertical = np.minimum(index - above, below[::-1] - index)
+    np.minimum(vertical, cap, out=vertical)
+
+    squared = vertical * vertical
+    padded = np.full((rows, cols + 2 * max_distance), cap * cap, dtype=np.int32)
+    padded[:, max_distance:max_distance + cols] = squared
+    best = squared.copy()
+    for dc in range(1, max_distance + 1):
+        offset = dc * dc
+        np.minimum(best, padded[:, max_distance + dc:max_distance + dc + cols] + offset, out=best)
+        np.minimum(best, padded[:, max_distance - dc:max_distance - dc + cols] + offset, out=best)
+    distance = np.sqrt(best, dtype=np.float32)
+    np.minimum(distance, cap, out=distance)
+    return distance
+
+
+class Costmap:
+    """Obstacle inflation layer over an occupancy grid.
+
+    Cells within ``robot_radius`` of a wall get ``INSCRIBED_COST`` and are
+    not passable; beyond that the cost decays exponentially out to
+    ``inflation_radius``, so routes keep clear of walls where there is
+    room. A polygon ``footprint`` (metres, robot-centred) overrides
+    ``robot_radius`` with its inscribed radius. ``step_cost`` is the extra
+    cost of entering each cell, ready for ``GridPlanner.set_costs``.
+    """
+
+    def __init__(self, occupancy, resolution, robot_radius=0.15, inflation_radius=0.5,
+                 cost_scaling=3.0, footprint=None, cost_weight=16):
+        if footprint is not None:
+            robot_radius, circumscribed = footprint_radii(footprint)
+            inflation_radius = max(inflation_radius, circumscribed)
+        self.resolution = resolution
+        self.robot_radius = robot_radius
+        self.inflation_radius = max(inflation_radius, robot_radius)
+        self.cost_scaling = cost_scaling
+        # A full-cost cell adds 252 / cost_weight steps to a route
+        self.cost_weight = cost_weight
+        self.radius_cells = int(math.ceil(self.inflation_radius / resolution))
+        self.windows_updated = 0
+        self.cells_updated = 0
+        self.occupied = None
+        self.set_occupancy(occupancy)
+
+    def set_occupancy(self, occupancy):
+        """Sync with the grid, recomputing only around the cells that changed."""
+        occupied = np.asarray(occupancy) != 0
+        if self.occupied is None or self.occupied.shape != occupied.shape:
+            self.occupied = occupied.copy()
+            rows, cols = occupied.shape
+            self.distance = np.empty((rows, cols), dtype=np.float32)
+            self.cost = np.empty((rows, cols), dtype=np.uint8)
+            self.passable = np.empty((rows, cols), dtype=bool)
+            self.step_cost = np.empty((rows, cols), dtype=np.int32)
+            self.update_window(0, 0, rows, cols)
+            return
+        changed = np.argwhere(self.occupied != occupied)
+        if len(changed) == 0:
+            return
+        self.occupied = occupied.copy()
+        top, left = changed.min(axis=0)
+        bottom, right = changed.max(axis=0) + 1
+        self.update_window(int(top), int(left), int(bottom), int(right))
+
+    def update_window(self, top, left, bottom, right):
+        # Cells within the inflation radius of the edit can change, and those
+        # depend on obstacles up to another radius further out
+        rows, cols = self.occupied.shape
+        reach = self.radius_cells
+        top, left = max(0, top - reach), max(0, left - reach)
+        bottom, right = min(rows, bottom + reach), min(cols, right + reach)
+        src_top, src_left = max(0, top - reach), max(0, left - reach)
+        src_bottom, src_right = min(rows, bottom + reach), min(cols, right + reach)
+
+        distance = distance_transform(self.occupied[src_top:src_bottom, src_left:src_right], reach)
+        distance = distance[top - src_top:bottom - src_top, left - src_left:right - src_left]
+        distance *= self.resolution
+        window = (slice(top, bottom), slice(left, right))
+        self.distance[window] = distance
+
+        decay = np.exp(-self.cost_scaling * np.maximum(distance - self.robot_radius, 0))
+        cost = np.where(distance <= self.inflation_radius,
+                        (INSCRIBED_COST - 1) * decay, FREE_COST).astype(np.uint8)
+        cost[distance <= self.robot_radius] = INSCRIBED_COST
+        cost[self.occupied[window]] = LETHAL_COST
+        self.cost[window] = cost
+        self.passable[window] = cost < INSCRIBED_COST
+        self.step_cost[window] = np.where(cost < INSCRIBED_COST, cost // self.cost_weight, 0)
+        self.windows_updated += 1
+        self.cells_updated += (bottom - top) * (right - left)
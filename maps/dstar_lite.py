@@ -0,0 +1,311 @@
+import heapq
+from collections import OrderedDict
+import numpy as np
+
+INF = float('inf')
+
+
+class DStarLite:
+    """D* Lite search state for one goal on a padded, flat-indexed grid.
+
+    The search runs backwards from the goal, so moving the start only bumps
+    the key modifier ``km`` and flipping cells only repairs the vertices
+    whose best successor went through them. Moving into a passable cell
+    costs ``step`` of that cell (1 plus any costmap cost), matching
+    ``GridPlanner`` with ``set_costs``.
+    """
+
+    def __init__(self, passable, inside, step, width, goal, start):
+        self.passable = passable
+        self.inside = inside
+        self.step = step
+        self.width = width
+        self.goal = goal
+        size = len(passable)
+        # Memoryviews over preallocated arrays are much cheaper to index from
+        # Python than the NumPy arrays themselves
+        self.g = memoryview(np.full(size, INF))
+        self.rhs = memoryview(np.full(size, INF))
+        self.key1 = memoryview(np.full(size, INF))
+        self.key2 = memoryview(np.full(size, INF))
+        self.in_open = memoryview(np.zeros(size, dtype=np.uint8))
+        self.open = []
+        self.km = 0
+        self.expanded = 0
+        self.start = start
+        self.start_r, self.start_c = divmod(start, width)
+        self.rhs[goal] = 0
+        self._update_vertex(goal)
+
+    def _h(self, s):
+        r, c = divmod(s, self.width)
+        return abs(r - self.start_r) + abs(c - self.start_c)
+
+    def _update_vertex(self, s):
+        g = self.g[s]
+        rhs = self.rhs[s]
+        if g != rhs:
+            k2 = g if g < rhs else rhs
+            k1 = k2 + self._h(s) + self.km
+            self.key1[s] = k1
+            self.key2[s] = k2
+            self.in_open[s] = 1
+            heapq.heappush(self.open, (k1, k2, s))
+        elif self.in_open[s]:
+            # Stale heap entries are skipped when they reach the top
+            self.in_open[s] = 0
+
+    def _best_successor_cost(self, s):
+        w = self.width
+        passable = self.passable
+        step = self.step
+        g = self.g
+        best = INF
+        for n in (s - w, s + w, s - 1, s + 1):
+            if passable[n] and g[n] + step[n] < best:
+                best = g[n] + step[n]
+        return best
+
+    def _top(self):
+        open_list = self.open
+        while open_list:
+            k1, k2, s = open_list[0]
+            if self.in_open[s] and self.key1[s] == k1 and self.key2[s] == k2:
+                return open_list[0]
+            heapq.heappop(open_list)
+        return None
+
+    def move_start(self, start):
+        if start == self.start:
+            return
+        self.km += self._h(start)
+        self.start = start
+        self.start_r, self.start_c = divmod(start, self.width)
+
+    def update_cells(self, changed, old_entry):
+        """Repair vertices around cells whose entry cost just changed.
+
+        ``old_entry`` holds what stepping into each changed cell cost before
+        (INF if it was blocked); the new cost is read from passable/step.
+        """
+        w = self.width
+        passable = self.passable
+        inside = self.inside
+        step = self.step
+        g = self.g
+        rhs = self.rhs
+        for v, old in zip(changed, old_entry):
+            v = int(v)
+            old_via = g[v] + old
+            new_via = g[v] + step[v] if passable[v] else INF
+            for u in (v - w, v + w, v - 1, v + 1):
+                if not inside[u] or u == self.goal:
+                    continue
+                if new_via < rhs[u]:
+                    rhs[u] = new_via
+                elif rhs[u] == old_via and new_via > old_via:
+                    rhs[u] = self._best_successor_cost(u)
+                self._update_vertex(u)
+
+    def compute(self):
+        w = self.width
+        goal = self.goal
+        passable = self.passable
+        inside = self.inside
+        step = self.step
+        g = self.g
+        rhs = self.rhs
+        start = self.start
+        expanded = 0
+
+        while True:
+            top = self._top()
+            start_k2 = min(g[start], rhs[start])
+            start_k1 = start_k2 + self.km
+            if top is None:
+                break
+            k1, k2, u = top
+            if (k1, k2) >= (start_k1, start_k2) and rhs[start] <= g[start]:
+                break
+            heapq.heappop(self.open)
+            new_k2 = min(g[u], rhs[u])
+            new_k1 = new_k2 + self._h(u) + self.km
+            if (k1, k2) < (new_k1, new_k2):
+                self.key1[u] = new_k1
+                self.key2[u] = new_k2
+                heapq.heappush(self.open, (new_k1, new_k2, u))
+                continue
+
+            expanded += 1
+            self.in_open[u] = 0
+            neighbors = (u - w, u + w, u - 1, u + 1)
+            if g[u] > rhs[u]:
+                g[u] = rhs[u]
+                if passable[u]:
+                    via_u = g[u] + step[u]
+                    for s in neighbors:
+                        if inside[s] and s != goal:
+                            if via_u < rhs[s]:
+                                rhs[s] = via_u
+                            self._update_vertex(s)
+            else:
+                via_u = g[u] + step[u]
+                g[u] = INF
+                if passable[u]:
+                    for s in neighbors:
+                        if inside[s] and s != goal and rhs[s] == via_u:
+                            rhs[s] = self._best_successor_cost(s)
+                            self._update_vertex(s)
+                if u != goal:
+                    rhs[u] = self._best_successor_cost(u)
+                self._update_vertex(u)
+
+        self.expanded = expanded
+
+    def extract_path(self):
+        """Follow the cheapest successors from start; [] if unreachable."""
+        w = self.width
+        passable = self.passable
+        step = self.step
+        g = self.g
+        current = self.start
+        # The start may legitimately stop the search while only rhs is final
+        if self.rhs[current] == INF:
+            return []
+        path = [current]
+        for _ in range(len(g)):
+            if current == self.goal:
+                return path
+            best = None
+            best_cost = INF
+            for n in (current - w, current + w, current - 1, current + 1):
+                if passable[n] and g[n] + step[n] < best_cost:
+                    best = n
+                    best_cost = g[n] + step[n]
+            if best is None:
+                return []
+            path.append(best)
+            current = best
+        return []
+
+
+class IncrementalPlanner:
+    """Keeps D* Lite search trees between queries, one per recent goal.
+
+    Switching back to a goal that is still cached (e.g. a POI station)
+    reuses its tree, and cell edits picked up by ``set_grid`` (or cost
+    edits from ``set_costs``) are repaired in every cached tree instead of
+    restarting the searches.
+    """
+
+    def __init__(self, passable, max_goals=4):
+        self.max_goals = max_goals
+        self.shape = None
+        self.states = OrderedDict()
+        self.expanded = 0
+        self.set_grid(passable)
+
+    def set_grid(self, passable):
+        passable = np.asarray(passable, dtype=bool)
+        rows, cols = passable.shape
+        if self.shape != (rows, cols):
+            self.shape = (rows, cols)
+            self.rows = rows
+            self.cols = cols
+            self.width = cols + 2
+            self.passable = np.zeros((rows + 2, self.width), dtype=np.uint8)
+            self.inside = np.zeros((rows + 2, self.width), dtype=np.uint8)
+            self.inside[1:-1, 1:-1] = 1
+            self.passable[1:-1, 1:-1] = passable
+            # Cost of stepping into each cell; see set_costs
+            self.step = np.ones((rows + 2, self.width), dtype=np.float64)
+            self.states.clear()
+            return
+
+        changed = np.flatnonzero(self.passable[1:-1, 1:-1] != passable)
+        if changed.size == 0:
+            return
+        self.passable[1:-1, 1:-1] = passable
+        if changed.size * 8 > rows * cols:
+            # Repairing this much is slower than searching from scratch
+            self.states.clear()
+            return
+        r, c = np.divmod(changed, cols)
+        changed = (r + 1) * self.width + c + 1
+        # Newly blocked cells used to cost their step, newly free ones INF
+        old_entry = np.where(self.passable.reshape(-1)[changed] == 1, np.inf,
+                             self.step.reshape(-1)[changed])
+        for state in self.states.values():
+            state.update_cells(changed, old_entry)
+
+    def set_costs(self, costs):
+        """Per-cell extra cost of entering a cell (e.g. ``Costmap.step_cost``).
+
+        None goes back to unit steps. Only cells whose cost changed are
+        repaired, and only where they are passable.
+        """
+        step = np.ones(self.shape, dtype=np.float64)
+        if costs is not None:
+            step += costs
+        inner = self.step[1:-1, 1:-1]
+        changed = np.flatnonzero((inner != step) & (self.passable[1:-1, 1:-1] == 1))
+        old_entry = inner.reshape(-1)[changed]
+        inner[...] = step
+        if changed.size == 0:
+            return
+        if changed.size * 8 > self.rows * self.cols:
+            self.states.clear()
+            return
+        r, c = np.divmod(changed, self.cols)
+        changed = (r + 1) * self.width + c + 1
+        for state in self.states.values():
+            state.update_cells(changed, old_entry)
+
+    def set_cell(self, pos, passable):
+        index = self.to_index(pos)
+        value = 1 if passable else 0
+        flat = self.passable.reshape(-1)
+        if flat[index] == value:
+            return
+        old_entry = self.step.reshape(-1)[index] if flat[index] else INF
+        flat[index] = value
+        for state in self.states.values():
+            state.update_cells((index,), (old_entry,))
+
+    def to_index(self, pos):
+        return (pos[0] + 1) * self.width + pos[1] + 1
+
+    def to_cell(self, index):
+        r, c = divmod(index, self.width)
+        return (r - 1, c - 1)
+
+    def in_bounds(self, pos):
+        return 0 <= pos[0] < self.rows and 0 <= pos[1] < self.cols
+
+    def find_path(self, start, goal):
+        """Return the list of cells from start to goal, or [] if unreachable."""
+        self.expanded = 0
+        if not self.in_bounds(start) or not self.in_bounds(goal):
+            return []
+        if start == goal:
+            return [start]
+
+        start_index = self.to_index(start)
+        goal_index = self.to_index(goal)
+        state = self.states.get(goal_index)
+        if state is None:
+            flat_passable = memoryview(self.passable.reshape(-1))
+            flat_inside = memoryview(self.inside.reshape(-1))
+            flat_step = memoryview(self.step.reshape(-1))
+            state = DStarLite(flat_passable, flat_inside, flat_step, self.width,
+                              goal_index, start_index)
+            self.states[goal_index] = state
+            while len(self.states) > self.max_goals:
+                self.states.popitem(last=False)
+        else:
+            self.states.move_to_end(goal_index)
+            state.move_start(start_index)
+
+        state.compute()
+        self.expanded = state.expanded
+        return [self.to_cell(index) for index in state.extract_path()]
@@ -0,0 +1,201 @@
+import heapq
+import numpy as np
+
+
+class GridPlanner:
+    """A*/Dijkstra on flat cell indices of a 4-connected, unit-cost grid.
+
+    The grid is stored padded with a one-cell impassable border so neighbour
+    expansion needs no bounds checks. Costs and parents live in preallocated
+    NumPy arrays that are accessed through memoryviews in the hot loop, and
+    the open list holds plain integer keys ``f * size + index``, which keeps
+    the tie-breaking of the original tuple-based ``heapq`` search.
+
+    ``set_costs`` adds an integer cost for entering each cell on top of the
+    unit step (e.g. a costmap's inflation), which keeps the Manhattan
+    heuristic admissible.
+    """
+
+    def __init__(self, passable):
+        self.shape = None
+        self.expanded = 0
+        self.extra_cost = None
+        self.set_grid(passable)
+
+    def set_grid(self, passable):
+        passable = np.asarray(passable, dtype=bool)
+        rows, cols = passable.shape
+        if self.shape != (rows, cols):
+            self.shape = (rows, cols)
+            self.rows = rows
+            self.cols = cols
+            self.width = cols + 2
+            self.size = (rows + 2) * self.width
+            self.passable = np.zeros((rows + 2, self.width), dtype=np.uint8)
+            self.g_cost = np.empty(self.size, dtype=np.int64)
+            self.parent = np.empty(self.size, dtype=np.int64)
+            self.closed = np.empty(self.size, dtype=np.uint8)
+            self.extra_cost = None
+        self.passable[1:-1, 1:-1] = passable
+
+    def set_costs(self, costs):
+        # None goes back to plain unit-cost steps
+        if costs is None:
+            self.extra_cost = None
+            return
+        if self.extra_cost is None:
+            self.extra_cost = np.zeros((self.rows + 2, self.width), dtype=np.int64)
+        self.extra_cost[1:-1, 1:-1] = costs
+
+    def set_cell(self, pos, passable):
+        self.passable[pos[0] + 1, pos[1] + 1] = 1 if passable else 0
+
+    def to_index(self, pos):
+        return (pos[0] + 1) * self.width + pos[1] + 1
+
+    def to_cell(self, index):
+        r, c = divmod(index, self.width)
+        return (r - 1, c - 1)
+
+    def in_bounds(self, pos):
+        return 0 <= pos[0] < self.rows and 0 <= pos[1] < self.cols
+
+    def find_path(self, start, goal, use_heuristic=True):
+        """Return the list of cells from start to goal, or [] if unreachable."""
+        self.expanded = 0
+        if not self.in_bounds(start) or not self.in_bounds(goal):
+            return []
+        if start == goal:
+            return [start]
+
+        width = self.width
+        size = self.size
+        self.g_cost.fill(-1)
+        self.closed.fill(0)
+        passable = memoryview(self.passable.reshape(-1))
+        g_cost = memoryview(self.g_cost)
+        parent = memoryview(self.parent)
+        closed = memoryview(self.closed)
+        weighted = self.extra_cost is not None
+        if weighted:
+            extra_cost = memoryview(self.extra_cost.reshape(-1))
+
+        goal_r, goal_c = goal[0] + 1, goal[1] + 1
+        start_index = self.to_index(start)
+        goal_index = self.to_index(goal)
+        if use_heuristic:
+            h_weight = 1
+        else:
+            h_weight = 0
+
+        g_cost[start_index] = 0
+        parent[start_index] = -1
+        frontier = [start_index]
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        expanded = 0
+        found = False
+
+        while frontier:
+            current = heappop(frontier) % size
+            if closed[current]:
+                continue
+            if current == goal_index:
+                found = True
+                break
+            closed[current] = 1
+            expanded += 1
+
+            r, c = divmod(current, width)
+            new_cost = g_cost[current] + 1
+            # Same order as IndoorMap.get_neighbors: up, down, left, right.
+            for nxt, nr, nc in (
+                (current - width, r - 1, c),
+                (current + width, r + 1, c),
+                (current - 1, r, c - 1),
+                (current + 1, r, c + 1),
+            ):
+                if not passable[nxt]:
+                    continue
+                step_cost = new_cost + extra_cost[nxt] if weighted else new_cost
+                old_cost = g_cost[nxt]
+                if old_cost < 0 or step_cost < old_cost:
+                    g_cost[nxt] = step_cost
+                    parent[nxt] = current
+                    h = abs(goal_r - nr) + abs(goal_c - nc)
+                    heappush(frontier, (step_cost + h_weight * h) * size + nxt)
+
+        self.expanded = expanded
+        if not found:
+            return []
+        return self.reconstruct(goal_index)
+
+    def distance_field(self, goal):
+        """Cost from every cell to goal (reverse Dijkstra), -1 if unreachable.
+
+        Plain grid steps, or with ``set_costs`` the same weighted step costs
+        ``find_path`` uses.
+        """
+        if not self.in_bounds(goal):
+            return np.full(self.shape, -1, dtype=np.int32)
+        width = self.width
+        dist_array = np.full((self.rows + 2, width), -1, dtype=np.int32)
+        # The padding ring is marked visited so it never enters the queue
+        dist_array[0, :] = dist_array[-1, :] = 0
+        dist_array[:, 0] = dist_array[:, -1] = 0
+        passable = memoryview(self.passable.reshape(-1))
+        dist = memoryview(dist_array.reshape(-1))
+
+        goal_index = self.to_index(goal)
+        dist[goal_index] = 0
+        if self.extra_cost is not None:
+            self._weighted_field(goal_index, passable, dist)
+            return dist_array[1:-1, 1:-1].copy()
+        queue = [goal_index]
+        head = 0
+        while head < len(queue):
+            current = queue[head]
+            head += 1
+            # Moving into a blocked cell is impossible, so it has no predecessors
+            if not passable[current]:
+                continue
+            new_dist = dist[current] + 1
+            for prev in (current - width, current + width, current - 1, current + 1):
+                if dist[prev] < 0:
+                    dist[prev] = new_dist
+                    queue.append(prev)
+
+        return dist_array[1:-1, 1:-1].copy()
+
+    def _weighted_field(self, goal_index, passable, dist):
+        # Stepping from prev into current costs 1 + extra_cost[current]
+        width = self.width
+        size = self.size
+        extra_cost = memoryview(self.extra_cost.reshape(-1))
+        settled = bytearray(size)
+        frontier = [goal_index]
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        while frontier:
+            current = heappop(frontier) % size
+            if settled[current]:
+                continue
+            settled[current] = 1
+            if not passable[current]:
+                continue
+            new_dist = dist[current] + 1 + extra_cost[current]
+            for prev in (current - width, current + width, current - 1, current + 1):
+                # The padding ring sits at 0, so it is never improved on
+                if settled[prev] or (dist[prev] >= 0 and dist[prev] <= new_dist):
+                    continue
+                dist[prev] = new_dist
+                heappush(frontier, new_dist * size + prev)
+
+    def reconstruct(self, index):
+        path = []
+        parent = self.parent
+        while index >= 0:
+            path.append(self.to_cell(index))
+            index = int(parent[index])
+        path.reverse()
+        return path
@@ -0,0 +1,330 @@
+import heapq
+import numpy as np
+
+
+class HierarchicalPlanner:
+    """HPA* over one or more floors, joined by lifts.
+
+    Each floor is cut into ``cluster_size`` square clusters. Wherever two
+    neighbouring clusters share a run of free border cells, one transition
+    (two for runs of 6 or more) becomes a pair of abstract nodes, and the
+    cell distances between the nodes of a cluster are precomputed as intra
+    edges. A query links start and goal into their clusters, searches the
+    abstract graph and only then expands the intra edges it used back into
+    cells. Routes are near-optimal rather than optimal, the usual HPA*
+    trade-off. Nodes are (floor, row, col) triples; ``find_path`` is the
+    single-floor (floor 0) shortcut that takes and returns (row, col) cells.
+    """
+
+    def __init__(self, floors, cluster_size=16, lifts=()):
+        if isinstance(floors, np.ndarray) and floors.ndim == 2:
+            floors = [floors]
+        self.floors = [np.array(floor, dtype=bool) for floor in floors]
+        self.cluster_size = cluster_size
+        self.borders = {}    # (floor, ci, cj, 'v'|'h') -> [(node, node), ...]
+        self.intra = {}      # (floor, ci, cj) -> {node: {node: cost}}
+        self.inter_adj = {}
+        self.lift_adj = {}
+        self.expanded = 0
+        self.clusters_rebuilt = 0
+        for floor in range(len(self.floors)):
+            for key in self._floor_borders(floor):
+                self._build_border(key)
+        for a, b, cost in lifts:
+            self._link_lift(a, b, cost)
+        for floor in range(len(self.floors)):
+            for key in self._floor_clusters(floor):
+                self._build_cluster(key)
+        self._rebuild_inter_adj()
+
+    def _cluster_counts(self, floor):
+        rows, cols = self.floors[floor].shape
+        cs = self.cluster_size
+        return -(-rows // cs), -(-cols // cs)
+
+    def _floor_clusters(self, floor):
+        n_rows, n_cols = self._cluster_counts(floor)
+        return [(floor, ci, cj) for ci in range(n_rows) for cj in range(n_cols)]
+
+    def _floor_borders(self, floor):
+        n_rows, n_cols = self._cluster_counts(floor)
+        keys = [(floor, ci, cj, 'v') for ci in range(n_rows) for cj in range(n_cols - 1)]
+        keys += [(floor, ci, cj, 'h') for ci in range(n_rows - 1) for cj in range(n_cols)]
+        return keys
+
+    def _cluster_bounds(self, key):
+        floor, ci, cj = key
+        rows, cols = self.floors[floor].shape
+        cs = self.cluster_size
+        return ci * cs, cj * cs, min((ci + 1) * cs, rows), min((cj + 1) * cs, cols)
+
+    def cluster_of(self, node):
+        cs = self.cluster_size
+        return (node[0], node[1] // cs, node[2] // cs)
+
+    def _build_border(self, key):
+        floor, ci, cj, side = key
+        grid = self.floors[floor]
+        top, left, bottom, right = self._cluster_bounds((floor, ci, cj))
+        if side == 'v':
+            line = right - 1
+            free = grid[top:bottom, line] & grid[top:bottom, line + 1]
+        else:
+            line = bottom - 1
+            free = grid[line, left:right] & grid[line + 1, left:right]
+        offset = top if side == 'v' else left
+
+        transitions = []
+        run_start = None
+        for i, is_free in enumerate(list(free) + [False]):
+            if is_free and run_start is None:
+                run_start = i
+            elif not is_free and run_start is not None:
+                length = i - run_start
+                if length < 6:
+                    picks = [run_start + (length - 1) // 2]
+                else:
+                    picks = [run_start, i - 1]
+                for pick in picks:
+                    if side == 'v':
+                        a = (floor, offset + pick, line)
+                        b = (floor, offset + pick, line + 1)
+                    else:
+                        a = (floor, line, offset + pick)
+                        b = (floor, line + 1, offset + pick)
+                    transitions.append((a, b))
+                run_start = None
+        self.borders[key] = transitions
+
+    def _cluster_borders(self, key):
+        floor, ci, cj = key
+        return [(floor, ci, cj, 'v'), (floor, ci, cj - 1, 'v'),
+                (floor, ci, cj, 'h'), (floor, ci - 1, cj, 'h')]
+
+    def _cluster_nodes(self, key):
+        nodes = set()
+        for border in self._cluster_borders(key):
+            for a, b in self.borders.get(border, ()):
+                nodes.add(a if self.cluster_of(a) == key else b)
+        for node in self.lift_adj:
+            if self.cluster_of(node) == key:
+                nodes.add(node)
+        return nodes
+
+    def _search_cluster(self, key, source):
+        """BFS from source that never leaves the cluster: (dist, parent) dicts."""
+        floor = key[0]
+        grid = self.floors[floor]
+        top, left, bottom, right = self._cluster_bounds(key)
+        source = (source[1], source[2])
+        dist = {source: 0}
+        parent = {source: None}
+        queue = [source]
+        head = 0
+        while head < len(queue):
+            r, c = queue[head]
+            head += 1
+            new_dist = dist[(r, c)] + 1
+            for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                if (top <= nr < bottom and left <= nc < right
+                        and (nr, nc) not in dist and grid[nr, nc]):
+                    dist[(nr, nc)] = new_dist
+                    parent[(nr, nc)] = (r, c)
+                    queue.append((nr, nc))
+        return dist, parent
+
+    def _build_cluster(self, key):
+        nodes = self._cluster_nodes(key)
+        edges = {}
+        for node in nodes:
+            dist, _ = self._search_cluster(key, node)
+            edges[node] = {other: dist[(other[1], other[2])] for other in nodes
+                           if other != node and (other[1], other[2]) in dist}
+        self.intra[key] = edges
+        self.clusters_rebuilt += 1
+
+    def _rebuild_inter_adj(self):
+        adjacency = {}
+        for transitions in self.borders.values():
+            for a, b in transitions:
+                adjacency.setdefault(a, []).append(b)
+                adjacency.setdefault(b, []).append(a)
+        self.inter_adj = adjacency
+
+    def _link_lift(self, a, b, cost):
+        self.lift_adj.setdefault(tuple(a), []).append((tuple(b), cost))
+        self.lift_adj.setdefault(tuple(b), []).append((tuple(a), cost))
+
+    def add_lift(self, a, b, cost=1):
+        """Connect two (floor, row, col) cells, e.g. a lift's doors."""
+        self._link_lift(a, b, cost)
+        for node in (tuple(a), tuple(b)):
+            self._build_cluster(self.cluster_of(node))
+
+    def set_floor(self, floor, passable):
+        """Replace a floor's grid, rebuilding only the clusters that changed."""
+        passable = np.asarray(passable, dtype=bool)
+        changed = np.argwhere(self.floors[floor] != passable)
+        self.floors[floor] = passable.copy()
+        self.cells_changed(floor, changed)
+
+    def set_cell(self, node, passable):
+        floor, r, c = node
+        if self.floors[floor][r, c] != bool(passable):
+            self.floors[floor][r, c] = bool(passable)
+            self.cells_changed(floor, [(r, c)])
+
+    def cells_changed(self, floor, cells):
+        cs = self.cluster_size
+        n_rows, n_cols = self._cluster_counts(floor)
+        clusters = set()
+        borders = set()
+        for r, c in cells:
+            ci, cj = r // cs, c // cs
+            clusters.add((floor, ci, cj))
+            # Only cells on a cluster edge can change that edge's transitions
+            if r % cs == cs - 1 and ci + 1 < n_rows:
+                borders.add((floor, ci, cj, 'h'))
+            if r % cs == 0 and ci > 0:
+                borders.add((floor, ci - 1, cj, 'h'))
+            if c % cs == cs - 1 and cj + 1 < n_cols:
+                borders.add((floor, ci, cj, 'v'))
+            if c % cs == 0 and cj > 0:
+                borders.add((floor, ci, cj - 1, 'v'))
+        for key in borders:
+            self._build_border(key)
+            _, ci, cj, side = key
+            clusters.add((floor, ci, cj))
+            clusters.add((floor, ci + 1, cj) if side == 'h' else (floor, ci, cj + 1))
+        for key in clusters:
+            self._build_cluster(key)
+        if borders:
+            self._rebuild_inter_adj()
+
+    def _passable(self, node):
+        return bool(self.floors[node[0]][node[1], node[2]])
+
+    def find_route(self, start, goal):
+        """Route between two (floor, row, col) cells, or [] if unreachable."""
+        start = tuple(start)
+        goal = tuple(goal)
+        self.expanded = 0
+        for node in (start, goal):
+            rows, cols = self.floors[node[0]].shape
+            if not (0 <= node[1] < rows and 0 <= node[2] < cols):
+                return []
+        if start == goal:
+            return [start]
+        if not self._passable(goal):
+            return []
+
+        # Temporary edges linking start and goal into their clusters. Like
+        # GridPlanner, a blocked start (e.g. the robot's cell inside the
+        # costmap's inflation zone) may still be left, so it is linked
+        # through its free neighbours, which can lie in other clusters
+        goal_cluster = self.cluster_of(goal)
+        if self._passable(start):
+            seeds = [(start, 0)]
+        else:
+            floor, r, c = start
+            rows, cols = self.floors[floor].shape
+            seeds = [((floor, nr, nc), 1)
+                     for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1))
+                     if 0 <= nr < rows and 0 <= nc < cols and self.floors[floor][nr, nc]]
+        start_edges = {}
+        start_seeds = {}
+        for seed, offset in seeds:
+            key = self.cluster_of(seed)
+            dist, _ = self._search_cluster(key, seed)
+            targets = self._cluster_nodes(key)
+            if key == goal_cluster:
+                targets.add(goal)
+            for node in targets:
+                d = dist.get((node[1], node[2]))
+                if d is not None and (node not in start_edges or d + offset < start_edges[node]):
+                    start_edges[node] = d + offset
+                    start_seeds[node] = seed
+        dist, _ = self._search_cluster(goal_cluster, goal)
+        goal_edges = {node: dist[(node[1], node[2])]
+                      for node in self._cluster_nodes(goal_cluster)
+                      if (node[1], node[2]) in dist}
+
+        use_heuristic = not self.lift_adj
+
+        def heuristic(node):
+            if use_heuristic:
+                return abs(node[1] - goal[1]) + abs(node[2] - goal[2])
+            return 0
+
+        frontier = [(heuristic(start), 0, start)]
+        cost = {start: 0}
+        came_from = {start: (None, None)}
+        closed = set()
+        found = False
+        while frontier:
+            _, g, node = heapq.heappop(frontier)
+            if node in closed:
+                continue
+            if node == goal:
+                found = True
+                break
+            closed.add(node)
+            self.expanded += 1
+
+            if node == start:
+                neighbors = [(other, c, 'start') for other, c in start_edges.items()]
+            else:
+                neighbors = [(other, c, 'intra') for other, c in
+                             self.intra.get(self.cluster_of(node), {}).get(node, {}).items()]
+            neighbors += [(other, 1, 'inter') for other in self.inter_adj.get(node, ())]
+            neighbors += [(other, c, 'lift') for other, c in self.lift_adj.get(node, ())]
+            if node in goal_edges:
+                neighbors.append((goal, goal_edges[node], 'intra'))
+
+            for other, step, kind in neighbors:
+                new_cost = g + step
+                if other not in cost or new_cost < cost[other]:
+                    cost[other] = new_cost
+                    came_from[other] = (node, kind)
+                    heapq.heappush(frontier, (new_cost + heuristic(other), new_cost, other))
+
+        if not found:
+            return []
+        hops = []
+        node = goal
+        while node != start:
+            previous, kind = came_from[node]
+            hops.append((previous, node, kind))
+            node = previous
+        hops.reverse()
+        _, node, kind = hops[0]
+        if kind == 'start':
+            # Out of the start cell first if it is blocked, then through
+            # the cluster its free neighbour is in
+            seed = start_seeds[node]
+            hops[0] = (seed, node, 'intra')
+            if seed != start:
+                hops.insert(0, (start, seed, 'step'))
+        return self._refine(hops)
+
+    def _refine(self, hops):
+        # Only the clusters the abstract route passes through are searched again
+        route = [hops[0][0]]
+        for a, b, kind in hops:
+            if kind != 'intra':
+                route.append(b)
+                continue
+            key = self.cluster_of(a)
+            _, parent = self._search_cluster(key, a)
+            cells = []
+            cell = (b[1], b[2])
+            while cell != (a[1], a[2]):
+                cells.append((a[0],) + cell)
+                cell = parent[cell]
+            cells.reverse()
+            route.extend(cells)
+        return route
+
+    def find_path(self, start, goal):
+        route = self.find_route((0,) + tuple(start), (0,) + tuple(goal))
+        return [(r, c) for _, r, c in route]
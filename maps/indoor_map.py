@@ -1,38 +1,154 @@
 import numpy as np
-import heapq
-import time
-from collections import deque
+from .grid_planner import GridPlanner
+from .dstar_lite import IncrementalPlanner
+from .route_cache import RouteCache
+from .jump_point import JumpPointPlanner
+from .hierarchical import HierarchicalPlanner
+from .costmap import Costmap
+
+FREE = 0
+OCCUPIED = 1
+
+# Cell codes of the composed `matrix` view
+WALL_CELL = 1
+POI_CELL = 2
+ROBOT_CELL = 3
+
 
 class IndoorMap:
-    def __init__(self, length=25, width=30, resolution=0.2):
+    def __init__(self, length=25, width=30, resolution=0.2, occupancy=None,
+                 poi_locations=None, current_location=(5, 5)):
+        # Without `occupancy` this builds the default demo floor; loaded maps
+        # (see map_io) pass their grid, POIs and start cell in instead.
         self.resolution = resolution
-        self.rows = int(length / resolution)
-        self.cols = int(width / resolution)
-        self.matrix = np.zeros((self.rows, self.cols))
-        self.matrix[0, :] = 1
-        self.matrix[-1, :] = 1
-        self.matrix[:, 0] = 1
-        self.matrix[:, -1] = 1
-        start_row = (self.rows - 15) // 2
-        start_col = (self.cols - 15) // 2
-        self.matrix[start_row:start_row+15, start_col:start_col+15] = 1
-        self.poi_locations = {
-            '1': (4, 6),
-            '2': (2, 27),
-            '3': (22, 6),
-            '4': (22, 27)
-        }
-        for poi_num, location in self.poi_locations.items():
-            self.matrix[location] = 2
-        self.current_location = (5, 5)
-        self.matrix[self.current_location] = 3
+        if occupancy is None:
+            self.rows = int(length / resolution)
+            self.cols = int(width / resolution)
+            # Layers: walls only in the occupancy grid, POIs and the robot
+            # pose are kept outside it so moving one never erases another.
+            self.occupancy = np.zeros((self.rows, self.cols), dtype=np.uint8)
+            self.occupancy[0, :] = OCCUPIED
+            self.occupancy[-1, :] = OCCUPIED
+            self.occupancy[:, 0] = OCCUPIED
+            self.occupancy[:, -1] = OCCUPIED
+            start_row = (self.rows - 15) // 2
+            start_col = (self.cols - 15) // 2
+            self.occupancy[start_row:start_row+15, start_col:start_col+15] = OCCUPIED
+            if poi_locations is None:
+                poi_locations = {
+                    '1': (4, 6),
+                    '2': (2, 27),
+                    '3': (22, 6),
+                    '4': (22, 27)
+                }
+        else:
+            self.occupancy = occupancy
+            self.rows, self.cols = occupancy.shape
+            length = self.rows * resolution
+            width = self.cols * resolution
+        self.occupancy_version = 0
+        # Called as listener(rows, cols) with the cells set_cells changed
+        self.occupancy_listeners = []
+        self.poi_locations = dict(poi_locations or {})
+        self.active_pois = set(self.poi_locations)
+        self.poi_version = 0
+        self.current_location = tuple(current_location)
         self.length_meters = length
         self.width_meters = width
+        # Planners allocate per-cell buffers, so they are built on first use
+        self.planner = None
+        self.planner_version = None
+        self.jump_planners = {}  # diagonal -> [planner, synced version]
+        self.hierarchical_planner = None  # built on first 'hpa' query
+        self.hierarchical_planner_version = None
+        self.incremental_planner = None
+        self.incremental_planner_version = None
+        self.costmap = None  # see enable_costmap
+        self.costmap_version = None
+        self.route_cache = RouteCache(self)
+
+    @property
+    def matrix(self):
+        # Composite of all layers (1 wall, 2 active POI, 3 robot), rebuilt on
+        # every access. It is read-only so a stale `matrix[r][c] = 1` raises
+        # instead of being lost; write through the layer methods instead.
+        matrix = self.occupancy.copy()
+        for poi_num in self.active_pois:
+            matrix[self.poi_locations[poi_num]] = POI_CELL
+        matrix[self.current_location] = ROBOT_CELL
+        matrix.setflags(write=False)
+        return matrix
+
+    def passable_mask(self):
+        return self.occupancy == FREE
+
+    def enable_costmap(self, robot_radius=0.15, inflation_radius=0.5, footprint=None,
+                       cost_scaling=3.0):
+        # From here on the planners avoid cells the robot can't fit in and
+        # A*/Dijkstra/D* Lite prefer keeping clear of walls
+        self.costmap = Costmap(self.occupancy, self.resolution, robot_radius,
+                               inflation_radius, cost_scaling, footprint)
+        self.costmap_version = self.occupancy_version
+        self.mark_occupancy_changed()
+
+    def planning_mask(self):
+        # Cells the robot's centre may occupy: free, and clear of walls by
+        # the robot radius when a costmap is enabled
+        if self.costmap is None:
+            return self.passable_mask()
+        if self.costmap_version != self.occupancy_version:
+            self.costmap.set_occupancy(self.occupancy)
+            self.costmap_version = self.occupancy_version
+        return self.costmap.passable.copy()
+
+    def is_free(self, pos):
+        return self.occupancy[pos] == FREE
+
+    def set_obstacle(self, pos, occupied=True):
+        self.set_cells([pos[0]], [pos[1]], occupied)
+
+    def set_obstacle_region(self, top, left, bottom, right, occupied=True):
+        # Bottom/right are exclusive, like slice bounds
+        rows = np.arange(self.rows)[top:bottom]
+        cols = np.arange(self.cols)[left:right]
+        rows, cols = np.meshgrid(rows, cols, indexing='ij')
+        self.set_cells(rows.ravel(), cols.ravel(), occupied)
+
+    def set_cells(self, rows, cols, occupied):
+        # Scattered edit from index arrays; only cells that actually flip
+        # bump the version and are passed on to the listeners
+        rows = np.asarray(rows, dtype=np.intp)
+        cols = np.asarray(cols, dtype=np.intp)
+        values = np.where(occupied, OCCUPIED, FREE).astype(np.uint8)
+        values = np.broadcast_to(values, rows.shape)
+        changed = self.occupancy[rows, cols] != values
+        if not changed.any():
+            return rows[:0], cols[:0]
+        rows, cols = rows[changed], cols[changed]
+        self.occupancy[rows, cols] = values[changed]
+        self.occupancy_version += 1
+        for listener in self.occupancy_listeners:
+            listener(rows, cols)
+        return rows, cols
+
+    def mark_occupancy_changed(self):
+        # For callers that edit `occupancy` directly
+        self.occupancy_version += 1
+
+    def set_active_pois(self, poi_nums):
+        active = {poi_num for poi_num in poi_nums if poi_num in self.poi_locations}
+        if active != self.active_pois:
+            self.active_pois = active
+            self.poi_version += 1
+
+    def poi_at(self, pos):
+        for poi_num in self.active_pois:
+            if self.poi_locations[poi_num] == tuple(pos):
+                return poi_num
+        return None
 
     def update_current_location(self, new_position):
-        self.matrix[self.current_location] = 0  # Clear old position
         self.current_location = new_position
-        self.matrix[new_position] = 3  # Mark new position
 
     def get_cell_size(self):
         return f"Each cell represents {self.resolution}x{self.resolution} meters"
@@ -51,35 +167,71 @@ class IndoorMap:
             (row-1, col), (row+1, col),
             (row, col-1), (row, col+1)
         ]
-        return [(r, c) for r, c in neighbors 
-                if 0 <= r < self.rows and 0 <= c < self.cols 
-                and self.matrix[r][c] != 1]
-
-    def find_path(self, start, end):
-        frontier = []
-        heapq.heappush(frontier, (0, start))
-        came_from = {start: None}
-        cost_so_far = {start: 0}
-
-        while frontier:
-            current = heapq.heappop(frontier)[1]
-
-            if current == end:
-                break
-
-            for next_pos in self.get_neighbors(current):
-                new_cost = cost_so_far[current] + 1
-                if next_pos not in cost_so_far or new_cost < cost_so_far[next_pos]:
-                    cost_so_far[next_pos] = new_cost
-                    priority = new_cost + self.heuristic(end, next_pos)
-                    heapq.heappush(frontier, (priority, next_pos))
-                    came_from[next_pos] = current
-
-        path = []
-        current = end
-        while current != start:
-            path.append(current)
-            current = came_from[current]
-        path.append(start)
-        path.reverse()
-        return path
\ No newline at end of file
+        return [(r, c) for r, c in neighbors
+                if 0 <= r < self.rows and 0 <= c < self.cols
+                and self.occupancy[r, c] == FREE]
+
+    def find_path(self, start, end, method='astar'):
+        # method: 'astar', 'dijkstra', 'jps' (4-connected), 'jps8' or 'hpa'
+        if method in ('jps', 'jps8'):
+            return self._jump_planner(method == 'jps8').find_path(start, end)
+        if method == 'hpa':
+            return self._hierarchical_planner().find_path(start, end)
+        if method not in ('astar', 'dijkstra'):
+            raise ValueError(f"Unknown path planning method: {method}")
+        if self.planner is None or self.planner_version != self.occupancy_version:
+            if self.planner is None:
+                self.planner = GridPlanner(self.planning_mask())
+            else:
+                self.planner.set_grid(self.planning_mask())
+            self.planner.set_costs(None if self.costmap is None else self.costmap.step_cost)
+        self.planner_version = self.occupancy_version
+        return self.planner.find_path(start, end, use_heuristic=method == 'astar')
+
+    def _jump_planner(self, diagonal):
+        entry = self.jump_planners.get(diagonal)
+        if entry is None:
+            entry = [JumpPointPlanner(self.planning_mask(), diagonal), self.occupancy_version]
+            self.jump_planners[diagonal] = entry
+        elif entry[1] != self.occupancy_version:
+            entry[0].set_grid(self.planning_mask())
+            entry[1] = self.occupancy_version
+        return entry[0]
+
+    def _hierarchical_planner(self, cluster_size=16):
+        if self.hierarchical_planner is None:
+            self.hierarchical_planner = HierarchicalPlanner(self.planning_mask(), cluster_size)
+        elif self.hierarchical_planner_version != self.occupancy_version:
+            # Diffs the grid, so only clusters around the edited cells are rebuilt
+            self.hierarchical_planner.set_floor(0, self.planning_mask())
+        self.hierarchical_planner_version = self.occupancy_version
+        return self.hierarchical_planner
+
+    def replan(self, start, end):
+        # Reuses the search tree from earlier calls; only repairs what changed
+        if self.incremental_planner is None or self.incremental_planner_version != self.occupancy_version:
+            if self.incremental_planner is None:
+                self.incremental_planner = IncrementalPlanner(self.planning_mask())
+            else:
+                self.incremental_planner.set_grid(self.planning_mask())
+            self.incremental_planner.set_costs(None if self.costmap is None else self.costmap.step_cost)
+        self.incremental_planner_version = self.occupancy_version
+        return self.incremental_planner.find_path(start, end)
+
+    def path_to_poi(self, start, poi):
+        # No search: walks down the POI's cached distance field
+        if poi not in self.poi_locations:
+            return []
+        return self.route_cache.path(start, self.poi_locations[poi])
+
+    def nearest_poi_by_distance(self, start, pois=None):
+        if pois is None:
+            pois = self.poi_locations.keys()
+        best_poi = None
+        best_dist = None
+        for poi in pois:
+            dist = self.route_cache.distance(start, self.poi_locations[poi])
+            if dist is not None and (best_dist is None or dist < best_dist):
+                best_poi = poi
+                best_dist = dist
+        return best_poi, best_dist
@@ -0,0 +1,221 @@
+import heapq
+import math
+import numpy as np
+
+SQRT2 = math.sqrt(2)
+
+
+class JumpPointPlanner:
+    """Jump Point Search on a uniform-cost grid, 4- or 8-connected.
+
+    Uses the same padded, flat-indexed grid as ``GridPlanner``. Only jump
+    points enter the open list; the straight (or diagonal) runs between
+    them are filled back in when the path is reconstructed, so the result
+    is a cell-by-cell path like ``GridPlanner.find_path`` returns. In the
+    8-connected mode diagonal steps cost sqrt(2) and may not cut corners,
+    i.e. both orthogonal neighbours must be free.
+    """
+
+    def __init__(self, passable, diagonal=False):
+        self.diagonal = diagonal
+        self.shape = None
+        self.expanded = 0
+        self.cost = 0
+        self.set_grid(passable)
+
+    def set_grid(self, passable):
+        passable = np.asarray(passable, dtype=bool)
+        rows, cols = passable.shape
+        if self.shape != (rows, cols):
+            self.shape = (rows, cols)
+            self.rows = rows
+            self.cols = cols
+            self.width = cols + 2
+            self.size = (rows + 2) * self.width
+            self.passable = np.zeros((rows + 2, self.width), dtype=np.uint8)
+            self.g_cost = np.empty(self.size, dtype=np.float64)
+            self.parent = np.empty(self.size, dtype=np.int64)
+            self.closed = np.empty(self.size, dtype=np.uint8)
+        self.passable[1:-1, 1:-1] = passable
+        # bytearray indexing is the cheapest thing the jump loops can do
+        self.grid = bytearray(self.passable.tobytes())
+
+    def to_index(self, pos):
+        return (pos[0] + 1) * self.width + pos[1] + 1
+
+    def to_cell(self, index):
+        r, c = divmod(index, self.width)
+        return (r - 1, c - 1)
+
+    def in_bounds(self, pos):
+        return 0 <= pos[0] < self.rows and 0 <= pos[1] < self.cols
+
+    def _jump4(self, i, dr, dc):
+        grid = self.grid
+        w = self.width
+        goal = self.goal
+        d = dr * w + dc
+        while True:
+            if not grid[i]:
+                return -1
+            if i == goal:
+                return i
+            if dc:
+                if (grid[i - w] and not grid[i - dc - w]) or (grid[i + w] and not grid[i - dc + w]):
+                    return i
+            else:
+                back = dr * w
+                if (grid[i - 1] and not grid[i - 1 - back]) or (grid[i + 1] and not grid[i + 1 - back]):
+                    return i
+                # Vertical runs stop where a horizontal run finds a jump point
+                if self._jump4(i + 1, 0, 1) >= 0 or self._jump4(i - 1, 0, -1) >= 0:
+                    return i
+            i += d
+
+    def _jump8(self, i, dr, dc):
+        grid = self.grid
+        w = self.width
+        goal = self.goal
+        d = dr * w + dc
+        while True:
+            if not grid[i]:
+                return -1
+            if i == goal:
+                return i
+            if dr and dc:
+                if self._jump8(i + dc, 0, dc) >= 0 or self._jump8(i + dr * w, dr, 0) >= 0:
+                    return i
+            elif dc:
+                if (grid[i - w] and not grid[i - dc - w]) or (grid[i + w] and not grid[i - dc + w]):
+                    return i
+            else:
+                back = dr * w
+                if (grid[i - 1] and not grid[i - 1 - back]) or (grid[i + 1] and not grid[i + 1 - back]):
+                    return i
+            # Diagonal steps need both orthogonal cells free (no corner cutting)
+            if not (grid[i + dc] and grid[i + dr * w]):
+                return -1
+            i += d
+
+    def _directions(self, i, parent):
+        grid = self.grid
+        w = self.width
+        if parent < 0:
+            dirs = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+            if self.diagonal:
+                for dr in (-1, 1):
+                    for dc in (-1, 1):
+                        if grid[i + dr * w] and grid[i + dc]:
+                            dirs.append((dr, dc))
+            return dirs
+
+        pr, pc = divmod(parent, w)
+        r, c = divmod(i, w)
+        dr = (r > pr) - (r < pr)
+        dc = (c > pc) - (c < pc)
+        dirs = []
+        if dr and dc:
+            vertical = grid[i + dr * w]
+            horizontal = grid[i + dc]
+            if vertical:
+                dirs.append((dr, 0))
+            if horizontal:
+                dirs.append((0, dc))
+            if vertical and horizontal:
+                dirs.append((dr, dc))
+        elif dc:
+            dirs.append((0, dc))
+            dirs.append((-1, 0))
+            dirs.append((1, 0))
+            if self.diagonal and grid[i + dc]:
+                for side in (-1, 1):
+                    if grid[i + side * w]:
+                        dirs.append((side, dc))
+        else:
+            dirs.append((dr, 0))
+            dirs.append((0, -1))
+            dirs.append((0, 1))
+            if self.diagonal and grid[i + dr * w]:
+                for side in (-1, 1):
+                    if grid[i + side]:
+                        dirs.append((dr, side))
+        return dirs
+
+    def _distance(self, a, b):
+        ar, ac = divmod(a, self.width)
+        br, bc = divmod(b, self.width)
+        dr = abs(ar - br)
+        dc = abs(ac - bc)
+        if self.diagonal:
+            return (SQRT2 - 1) * min(dr, dc) + max(dr, dc)
+        return dr + dc
+
+    def find_path(self, start, goal):
+        """Return the list of cells from start to goal, or [] if unreachable."""
+        self.expanded = 0
+        self.cost = 0
+        if not self.in_bounds(start) or not self.in_bounds(goal):
+            return []
+        if start == goal:
+            return [start]
+
+        start_index = self.to_index(start)
+        self.goal = self.to_index(goal)
+        self.g_cost.fill(np.inf)
+        self.closed.fill(0)
+        g_cost = memoryview(self.g_cost)
+        parent = memoryview(self.parent)
+        closed = memoryview(self.closed)
+        jump = self._jump8 if self.diagonal else self._jump4
+        distance = self._distance
+        w = self.width
+
+        g_cost[start_index] = 0
+        parent[start_index] = -1
+        frontier = [(distance(start_index, self.goal), start_index)]
+        expanded = 0
+        found = False
+        while frontier:
+            _, current = heapq.heappop(frontier)
+            if closed[current]:
+                continue
+            if current == self.goal:
+                found = True
+                break
+            closed[current] = 1
+            expanded += 1
+            for dr, dc in self._directions(current, parent[current]):
+                point = jump(current + dr * w + dc, dr, dc)
+                if point < 0 or closed[point]:
+                    continue
+                new_cost = g_cost[current] + distance(current, point)
+                if new_cost < g_cost[point]:
+                    g_cost[point] = new_cost
+                    parent[point] = current
+                    heapq.heappush(frontier, (new_cost + distance(point, self.goal), point))
+
+        self.expanded = expanded
+        if not found:
+            return []
+        self.cost = g_cost[self.goal]
+        return self.reconstruct(self.goal)
+
+    def reconstruct(self, index):
+        # Jump points are joined by straight or diagonal runs; fill them in
+        jump_points = []
+        while index >= 0:
+            jump_points.append(index)
+            index = int(self.parent[index])
+        jump_points.reverse()
+        w = self.width
+        path = [self.to_cell(jump_points[0])]
+        for a, b in zip(jump_points, jump_points[1:]):
+            ar, ac = divmod(a, w)
+            br, bc = divmod(b, w)
+            dr = (br > ar) - (br < ar)
+            dc = (bc > ac) - (bc < ac)
+            while (ar, ac) != (br, bc):
+                ar += dr
+                ac += dc
+                path.append((ar - 1, ac - 1))
+        return path
@@ -0,0 +1,169 @@
+import os
+import numpy as np
+import yaml
+from .indoor_map import IndoorMap, FREE, OCCUPIED
+
+try:
+    from PIL import Image
+except ImportError:  # PNG support is optional, PGM and .npy are not
+    Image = None
+
+# map_server defaults
+OCCUPIED_THRESH = 0.65
+FREE_THRESH = 0.196
+
+# Image rows are converted this many at a time so a large PGM is never
+# held in memory as anything wider than the final uint8 grid
+TILE_ROWS = 256
+
+
+def read_pgm(path, mmap=True):
+    """Pixels of a binary (P5) PGM as a (rows, cols) array.
+
+    With ``mmap`` the pixel block is memory-mapped rather than read, so only
+    the rows that are touched are paged in.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(512)
+    fields = []
+    pos = 0
+    while len(fields) < 4:
+        while pos < len(header) and header[pos:pos + 1].isspace():
+            pos += 1
+        if header[pos:pos + 1] == b'#':
+            pos = header.index(b'\n', pos) + 1
+            continue
+        end = pos
+        while end < len(header) and not header[end:end + 1].isspace():
+            end += 1
+        fields.append(header[pos:end])
+        pos = end
+    if fields[0] != b'P5':
+        raise ValueError(f"{path}: only binary (P5) PGM files are supported")
+    cols, rows, maxval = int(fields[1]), int(fields[2]), int(fields[3])
+    dtype = np.dtype(np.uint8 if maxval < 256 else '>u2')
+    offset = pos + 1  # a single whitespace byte ends the header
+    if mmap:
+        return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(rows, cols)), maxval
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return np.fromfile(f, dtype=dtype, count=rows * cols).reshape(rows, cols), maxval
+
+
+def write_pgm(path, pixels):
+    pixels = np.asarray(pixels, dtype=np.uint8)
+    rows, cols = pixels.shape
+    with open(path, 'wb') as f:
+        f.write(f"P5\n{cols} {rows}\n255\n".encode('ascii'))
+        f.write(pixels.tobytes())
+
+
+def read_image(path, mmap=True):
+    if path.lower().endswith('.pgm'):
+        return read_pgm(path, mmap)
+    if Image is None:
+        raise ImportError(f"Loading {path} needs Pillow; use a PGM or .npy map instead")
+    image = Image.open(path).convert('L')
+    return np.asarray(image), 255
+
+
+def image_to_occupancy(pixels, maxval=255, negate=False,
+                       occupied_thresh=OCCUPIED_THRESH, free_thresh=FREE_THRESH):
+    # map_server's trinary mode; unknown cells count as occupied so the
+    # planners never route through space nobody has seen
+    occupancy = np.empty(pixels.shape, dtype=np.uint8)
+    for top in range(0, pixels.shape[0], TILE_ROWS):
+        tile = np.asarray(pixels[top:top + TILE_ROWS], dtype=np.float32) / maxval
+        p = tile if negate else 1.0 - tile
+        occupancy[top:top + TILE_ROWS] = np.where(p < free_thresh, FREE, OCCUPIED)
+    return occupancy
+
+
+def occupancy_to_image(occupancy):
+    pixels = np.empty(occupancy.shape, dtype=np.uint8)
+    for top in range(0, occupancy.shape[0], TILE_ROWS):
+        tile = occupancy[top:top + TILE_ROWS]
+        pixels[top:top + TILE_ROWS] = np.where(tile == FREE, 254, 0)
+    return pixels
+
+
+def load_occupancy(path, mmap=True):
+    """Open a raw ``.npy`` occupancy grid.
+
+    Memory-mapped copy-on-write: pages are read as the map is touched and
+    edits stay in memory, the file on disk is never modified.
+    """
+    occupancy = np.load(path, mmap_mode='c' if mmap else None)
+    if occupancy.dtype != np.uint8 or occupancy.ndim != 2:
+        raise ValueError(f"{path}: expected a 2-D uint8 occupancy grid")
+    return occupancy
+
+
+def read_map(path, mmap=True):
+    """Keyword arguments for ``IndoorMap`` read from a map file.
+
+    ``path`` is either a raw ``.npy`` grid or a map_server style YAML file
+    whose ``image`` is a PGM, PNG or ``.npy``. Besides the usual
+    ``resolution``/``negate``/thresholds the YAML may list ``pois``
+    (name -> [row, col]) and a ``start`` cell. Image row 0 is grid row 0.
+    """
+    if path.lower().endswith('.npy'):
+        return {'occupancy': load_occupancy(path, mmap)}
+
+    with open(path) as f:
+        meta = yaml.safe_load(f)
+    image_path = os.path.join(os.path.dirname(path), meta['image'])
+    if image_path.lower().endswith('.npy'):
+        occupancy = load_occupancy(image_path, mmap)
+    else:
+        pixels, maxval = read_image(image_path, mmap)
+        occupancy = image_to_occupancy(pixels, maxval, bool(meta.get('negate', 0)),
+                                       meta.get('occupied_thresh', OCCUPIED_THRESH),
+                                       meta.get('free_thresh', FREE_THRESH))
+    kwargs = {
+        'occupancy': occupancy,
+        'resolution': meta.get('resolution', 0.2),
+        'poi_locations': {str(name): (int(cell[0]), int(cell[1]))
+                          for name, cell in (meta.get('pois') or {}).items()},
+    }
+    if 'start' in meta:
+        kwargs['current_location'] = (int(meta['start'][0]), int(meta['start'][1]))
+    return kwargs
+
+
+def load_map(path, mmap=True):
+    return IndoorMap(**read_map(path, mmap))
+
+
+def save_map(indoor_map, path, image='pgm'):
+    """Write ``indoor_map`` as a raw ``.npy`` grid or as YAML plus an image.
+
+    For a YAML path the grid goes next to it as ``<name>.pgm`` (or ``.npy``
+    with ``image='npy'``, which loads back memory-mapped).
+    """
+    if path.lower().endswith('.npy'):
+        np.save(path, np.ascontiguousarray(indoor_map.occupancy, dtype=np.uint8))
+        return path
+
+    stem = os.path.splitext(path)[0]
+    image_path = f"{stem}.{image}"
+    if image == 'npy':
+        np.save(image_path, np.ascontiguousarray(indoor_map.occupancy, dtype=np.uint8))
+    elif image == 'pgm':
+        write_pgm(image_path, occupancy_to_image(indoor_map.occupancy))
+    else:
+        raise ValueError(f"Unknown map image format: {image}")
+    meta = {
+        'image': os.path.basename(image_path),
+        'resolution': indoor_map.resolution,
+        'origin': [0.0, 0.0, 0.0],
+        'negate': 0,
+        'occupied_thresh': OCCUPIED_THRESH,
+        'free_thresh': FREE_THRESH,
+        'pois': {name: [int(cell[0]), int(cell[1])]
+                 for name, cell in indoor_map.poi_locations.items()},
+        'start': [int(v) for v in indoor_map.current_location],
+    }
+    with open(path, 'w') as f:
+        yaml.safe_dump(meta, f, sort_keys=False)
+    return path
@@ -0,0 +1,98 @@
+import numpy as np
+from .indoor_map import FREE
+
+
+class OccupancyMapper:
+    """Log-odds occupancy layer that edits an IndoorMap as evidence arrives.
+
+    Each cell keeps a log-odds value, clamped to ``limits``. The cells
+    under the robot's footprint get ``miss`` every time the pose moves,
+    a bump report adds ``bump`` to the cell that was hit, and a range
+    reading adds ``miss`` along its ray and ``hit`` at the end. Contact is
+    the strongest evidence there is, so ``bump`` alone outweighs a cell
+    seen free down to the lower limit. A cell becomes occupied at
+    ``occupied_threshold`` and is freed again only below
+    ``free_threshold``, so noise near the threshold does not make it
+    flicker. Walls from the static map count as known and are never
+    cleared. Every update works on index arrays of the touched cells and
+    ends in one ``IndoorMap.set_cells`` call, so listeners hear about the
+    cells that actually flipped.
+    """
+
+    def __init__(self, indoor_map, hit=0.85, miss=-0.4, bump=4.0, limits=(-2.0, 3.5),
+                 occupied_threshold=1.0, free_threshold=-0.2, robot_radius=0.15):
+        self.indoor_map = indoor_map
+        self.resolution = indoor_map.resolution
+        self.hit = hit
+        self.miss = miss
+        self.bump = bump
+        self.limits = limits
+        self.occupied_threshold = occupied_threshold
+        self.free_threshold = free_threshold
+        self.robot_radius = robot_radius
+        self.static = indoor_map.occupancy != FREE
+        self.log_odds = np.zeros(indoor_map.occupancy.shape, dtype=np.float32)
+        self.updates = 0
+        self.cells_changed = 0
+
+    def cell(self, x, y):
+        return (int(round(y / self.resolution)), int(round(x / self.resolution)))
+
+    def in_bounds(self, rows, cols):
+        shape = self.log_odds.shape
+        return (rows >= 0) & (rows < shape[0]) & (cols >= 0) & (cols < shape[1])
+
+    def probability(self):
+        return 1 - 1 / (1 + np.exp(self.log_odds))
+
+    def observe_free(self, x, y):
+        # Cells whose centre lies under the robot's footprint at (x, y)
+        res = self.resolution
+        reach = int(np.ceil(self.robot_radius / res))
+        row, col = self.cell(x, y)
+        rows, cols = np.mgrid[row - reach:row + reach + 1, col - reach:col + reach + 1]
+        inside = (cols * res - x) ** 2 + (rows * res - y) ** 2 <= self.robot_radius ** 2
+        inside[reach, reach] = True  # the robot's own cell, whatever the radius
+        inside &= self.in_bounds(rows, cols)
+        return self.update(rows[inside], cols[inside], self.miss)
+
+    def observe_obstacle(self, x, y, delta=None):
+        row, col = self.cell(x, y)
+        rows, cols = np.array([row]), np.array([col])
+        if not self.in_bounds(rows, cols).all():
+            return rows[:0], cols[:0]
+        return self.update(rows, cols, self.bump if delta is None else delta)
+
+    def observe_ray(self, x0, y0, x1, y1, hit=True):
+        # Samples the segment at half-cell steps; every cell it passes
+        # through is free except the end cell, which is the hit (if any)
+        res = self.resolution
+        steps = max(2, int(np.ceil(np.hypot(x1 - x0, y1 - y0) / (res / 2))) + 1)
+        rows = np.rint(np.linspace(y0, y1, steps) / res).astype(np.intp)
+        cols = np.rint(np.linspace(x0, x1, steps) / res).astype(np.intp)
+        keep = self.in_bounds(rows, cols)
+        rows, cols = rows[keep], cols[keep]
+        if len(rows) == 0:
+            return rows, cols
+        end = self.cell(x1, y1)
+        flat = np.unique(rows * self.log_odds.shape[1] + cols)
+        rows, cols = np.divmod(flat, self.log_odds.shape[1])
+        delta = np.full(len(rows), self.miss, dtype=np.float32)
+        at_end = (rows == end[0]) & (cols == end[1])
+        delta[at_end] = self.hit if hit else self.miss
+        return self.update(rows, cols, delta)
+
+    def update(self, rows, cols, delta):
+        """Add ``delta`` to the (unique) cells and apply any that flip."""
+        log_odds = self.log_odds
+        values = np.clip(log_odds[rows, cols] + delta, *self.limits)
+        log_odds[rows, cols] = values
+        occupied = self.indoor_map.occupancy[rows, cols] != FREE
+        # Hysteresis: occupied cells stay so until the evidence swings back
+        occupied = np.where(occupied, values > self.free_threshold,
+                            values >= self.occupied_threshold)
+        occupied |= self.static[rows, cols]
+        self.updates += 1
+        changed_rows, changed_cols = self.indoor_map.set_cells(rows, cols, occupied)
+        self.cells_changed += len(changed_rows)
+        return changed_rows, changed_cols
@@ -0,0 +1,108 @@
+def step_direction(a, b):
+    # Same naming as IndoorMapGUI.calculate_direction
+    if b[0] < a[0]:
+        return 'UP'
+    elif b[0] > a[0]:
+        return 'DOWN'
+    elif b[1] < a[1]:
+        return 'LEFT'
+    elif b[1] > a[1]:
+        return 'RIGHT'
+    return 'STOP'
+
+
+def corner_indices(path):
+    """Indices of the start, every turn and the end of a grid path.
+
+    Consecutive waypoints of the result are joined by straight,
+    axis-aligned runs, so each pair maps to one motion command.
+    """
+    if len(path) < 2:
+        return list(range(len(path)))
+    indices = [0]
+    direction = step_direction(path[0], path[1])
+    for i in range(1, len(path) - 1):
+        next_direction = step_direction(path[i], path[i + 1])
+        if next_direction != direction:
+            indices.append(i)
+            direction = next_direction
+    indices.append(len(path) - 1)
+    return indices
+
+
+def line_cells(a, b):
+    """Every cell touched by the segment between the centres of a and b.
+
+    Where the segment passes exactly through a cell corner both side cells
+    are included, so a clear line of sight never cuts a wall corner.
+    """
+    r, c = a
+    dr = abs(b[0] - r)
+    dc = abs(b[1] - c)
+    sr = 1 if b[0] > r else -1
+    sc = 1 if b[1] > c else -1
+    cells = [(r, c)]
+    ir = ic = 0
+    while ir < dr or ic < dc:
+        # Compare the parameters of the next column and row crossings
+        t_col = (2 * ic + 1) * dr
+        t_row = (2 * ir + 1) * dc
+        if t_col == t_row:
+            cells.append((r, c + sc))
+            cells.append((r + sr, c))
+            r += sr
+            c += sc
+            ir += 1
+            ic += 1
+        elif t_col < t_row:
+            c += sc
+            ic += 1
+        else:
+            r += sr
+            ir += 1
+        cells.append((r, c))
+    return cells
+
+
+def has_line_of_sight(passable, a, b):
+    rows, cols = passable.shape
+    for r, c in line_cells(a, b):
+        if not (0 <= r < rows and 0 <= c < cols) or not passable[r, c]:
+            return False
+    return True
+
+
+def line_of_sight_indices(path, passable):
+    """Any-angle waypoints: keep only the path cells a straight line can't skip.
+
+    Greedy string pulling over a grid path (the post-processing variant of
+    Theta*); returns indices into ``path`` like ``corner_indices``.
+    """
+    if len(path) < 3:
+        return list(range(len(path)))
+    indices = [0]
+    anchor = 0
+    for i in range(2, len(path)):
+        if not has_line_of_sight(passable, path[anchor], path[i]):
+            anchor = i - 1
+            indices.append(anchor)
+    indices.append(len(path) - 1)
+    return indices
+
+
+def path_segments(path, indices, resolution):
+    """(start_index, end_index, direction, length_m) for each waypoint pair.
+
+    Diagonal segments from any-angle smoothing get direction None.
+    """
+    segments = []
+    for start, end in zip(indices, indices[1:]):
+        a = path[start]
+        b = path[end]
+        if a[0] == b[0] or a[1] == b[1]:
+            direction = step_direction(a, b)
+        else:
+            direction = None
+        length = ((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2) ** 0.5 * resolution
+        segments.append((start, end, direction, length))
+    return segments
@@ -0,0 +1,91 @@
+from collections import OrderedDict
+import numpy as np
+from .grid_planner import GridPlanner
+
+
+class RouteCache:
+    """LRU cache of reverse-Dijkstra distance fields, one per goal cell.
+
+    With a field cached, the route from any cell is a walk down the distance
+    gradient and the true (wall-aware) distance is a single array lookup.
+    With a costmap enabled the fields use its step costs, so distances rank
+    the same way ``replan`` costs do. Every field is dropped as soon as the
+    map's ``occupancy_version`` moves past the one the fields were computed on.
+    """
+
+    def __init__(self, indoor_map, capacity=8):
+        self.indoor_map = indoor_map
+        self.capacity = capacity
+        self.fields = OrderedDict()
+        self.passable = None
+        self.costs = None
+        self.version = None
+        self.planner = None
+        self.hits = 0
+        self.misses = 0
+
+    def _check_grid(self):
+        version = self.indoor_map.occupancy_version
+        if self.passable is not None and self.version == version:
+            return
+        self.passable = self.indoor_map.planning_mask()
+        costmap = self.indoor_map.costmap
+        self.costs = None if costmap is None else costmap.step_cost.astype(np.int64)
+        self.version = version
+        self.fields.clear()
+        if self.planner is None:
+            self.planner = GridPlanner(self.passable)
+        else:
+            self.planner.set_grid(self.passable)
+        self.planner.set_costs(self.costs)
+
+    def invalidate(self):
+        self.passable = None
+        self.fields.clear()
+
+    def distance_field(self, goal):
+        self._check_grid()
+        goal = tuple(goal)
+        field = self.fields.get(goal)
+        if field is not None:
+            self.hits += 1
+            self.fields.move_to_end(goal)
+            return field
+        self.misses += 1
+        field = self.planner.distance_field(goal)
+        self.fields[goal] = field
+        while len(self.fields) > self.capacity:
+            self.fields.popitem(last=False)
+        return field
+
+    def distance(self, start, goal):
+        """Path cost from start to goal (grid steps plus any costmap step
+        costs), or None if unreachable."""
+        dist = int(self.distance_field(goal)[start])
+        return dist if dist >= 0 else None
+
+    def path(self, start, goal):
+        """Cheapest path found by descending the goal's distance field."""
+        field = self.distance_field(goal)
+        rows, cols = field.shape
+        if not (0 <= start[0] < rows and 0 <= start[1] < cols):
+            return []
+        dist = int(field[start])
+        if dist < 0:
+            return []
+        passable = self.passable
+        costs = self.costs
+        path = [tuple(start)]
+        row, col = start
+        while dist > 0:
+            # The next cell is one whose distance is ours less the cost of entering it
+            for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                if not (0 <= r < rows and 0 <= c < cols) or not passable[r, c]:
+                    continue
+                step = 1 if costs is None else 1 + int(costs[r, c])
+                if field[r, c] == dist - step:
+                    row, col = r, c
+                    dist -= step
+                    break
+            path.append((row, col))
+        return path
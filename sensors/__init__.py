@@ -1 +1,5 @@
-from .mouse_sensor import MouseSensor
\ No newline at end of file
+from .mouse_sensor import MouseSensor
+from .odometry_reader import OdometryReader
+from .replay_mouse import ReplayMouse
+from .frame_batch import FRAME_DTYPE, decode_frames, load_frame_log
+from .pose_estimator import PoseEstimator
\ No newline at end of file
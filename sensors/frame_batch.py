@@ -0,0 +1,80 @@
+import os
+import sys
+import numpy as np
+
+# Same layout as the '<HhhH' struct used by MouseSensor.parse_frame
+FRAME_DTYPE = np.dtype([
+    ('id_flag', '<u2'),
+    ('x', '<i2'),
+    ('y', '<i2'),
+    ('reserved', '<u2'),
+])
+FRAME_SIZE = FRAME_DTYPE.itemsize
+
+
+def decode_frames(buffer):
+    """View a bytes-like buffer of back-to-back frames as a structured array.
+
+    No bytes are copied; a trailing partial frame is ignored.
+    """
+    count = len(buffer) // FRAME_SIZE
+    return np.frombuffer(buffer, dtype=FRAME_DTYPE, count=count)
+
+
+def integrate(frames, x_start=0, y_start=0):
+    """Running (x, y) count totals after every frame."""
+    x = np.cumsum(frames['x'], dtype=np.int64)
+    y = np.cumsum(frames['y'], dtype=np.int64)
+    x += x_start
+    y += y_start
+    return x, y
+
+
+def displacement_mm(frames, counts_per_mm=39):
+    x, y = integrate(frames)
+    return x / counts_per_mm, y / counts_per_mm
+
+
+def load_frame_log(path, mmap=True):
+    """Open a raw log of concatenated 8-byte frames.
+
+    With ``mmap`` the file is mapped read-only, so hours of data can be
+    processed without reading it all into memory first.
+    """
+    count = os.path.getsize(path) // FRAME_SIZE
+    if mmap and count:
+        return np.memmap(path, dtype=FRAME_DTYPE, mode='r', shape=(count,))
+    return np.fromfile(path, dtype=FRAME_DTYPE, count=count)
+
+
+def append_frame_log(log, buffer):
+    # log: a path, or a file already open for binary appending (cheaper
+    # when called for every batch, as OdometryReader does)
+    data = memoryview(buffer)[:len(buffer) - len(buffer) % FRAME_SIZE]
+    if hasattr(log, 'write'):
+        log.write(data)
+        return
+    with open(log, 'ab') as f:
+        f.write(data)
+
+
+def summarize(frames, counts_per_mm=39):
+    x_mm, y_mm = displacement_mm(frames, counts_per_mm)
+    x_total, y_total = integrate(frames)
+    return {
+        'frames': len(frames),
+        'x_total': int(x_total[-1]) if len(frames) else 0,
+        'y_total': int(y_total[-1]) if len(frames) else 0,
+        'x_mm': float(x_mm[-1]) if len(frames) else 0.0,
+        'y_mm': float(y_mm[-1]) if len(frames) else 0.0,
+        'path_mm': float(np.hypot(np.diff(x_mm, prepend=0), np.diff(y_mm, prepend=0)).sum()),
+    }
+
+
+if __name__ == "__main__":
+    # python -m sensors.frame_batch FRAME_LOG [COUNTS_PER_MM]
+    # Re-runs a raw log written by OdometryReader(frame_log=...), e.g. to
+    # try another calibration on a recorded drive
+    counts_per_mm = float(sys.argv[2]) if len(sys.argv) > 2 else 39
+    for name, value in summarize(load_frame_log(sys.argv[1]), counts_per_mm).items():
+        print(f"{name:<8} {value}")
@@ -1,9 +1,10 @@
 import usb.core
 import usb.util
 import struct
+from .frame_batch import FRAME_SIZE, decode_frames
 
 class MouseSensor:
-    def __init__(self):
+    def __init__(self, verbose=True):
         self.device = usb.core.find(idVendor=0x17ef, idProduct=0x60d1)
         if self.device is None:
             raise ValueError("Device not found")
@@ -15,20 +16,54 @@ class MouseSensor:
         self.x_total = 0
         self.y_total = 0
         self.counts_per_mm = 39  # Counts per mmgit 
+        self.verbose = verbose
+        self.batch_buffer = bytearray(FRAME_SIZE * 64)
 
     def read_data(self):
         try:
             # Read 8 bytes from endpoint 0x81
             data = self.device.read(0x81, 8, timeout=1000)
-            print(f"Raw Data: {list(data)}")
+            if self.verbose:
+                print(f"Raw Data: {list(data)}")
             return data
         except usb.core.USBError as e:
-            if e.errno == 110:  # Timeout error on Linux
-                print("Read timeout occurred.")
-            else:
-                print(f"USB Error: {e}")
+            if self.verbose:
+                if e.errno == 110:  # Timeout error on Linux
+                    print("Read timeout occurred.")
+                else:
+                    print(f"USB Error: {e}")
         return None
 
+    def read_frame(self, timeout=1000):
+        # Quiet read for OdometryReader: None on timeout, raises other errors
+        try:
+            return bytes(self.device.read(0x81, 8, timeout=timeout))
+        except usb.core.USBError as e:
+            if e.errno == 110:
+                return None
+            raise
+
+    def read_frames(self, max_frames=64, timeout=1000):
+        # Fills one reusable bytearray; only the first read waits the full
+        # timeout, the rest just drain what the endpoint already has queued
+        if len(self.batch_buffer) < max_frames * FRAME_SIZE:
+            self.batch_buffer = bytearray(max_frames * FRAME_SIZE)
+        view = memoryview(self.batch_buffer)
+        filled = 0
+        wait = timeout
+        while filled < max_frames:
+            frame = self.read_frame(wait)
+            if frame is None or len(frame) != FRAME_SIZE:
+                break
+            view[filled * FRAME_SIZE:(filled + 1) * FRAME_SIZE] = frame
+            filled += 1
+            wait = 1
+        return view[:filled * FRAME_SIZE]
+
+    def parse_frames(self, buffer):
+        # Zero-copy structured view: fields id_flag, x, y, reserved
+        return decode_frames(buffer)
+
     def read_and_parse_data(self):
         data = self.read_data()
         if data:
@@ -41,7 +76,8 @@ class MouseSensor:
 
     def parse_frame(self, frame_bytes):
         if len(frame_bytes) != 8:
-            print("Invalid frame length")
+            if self.verbose:
+                print("Invalid frame length")
             return None
         
         # Unpack the frame
@@ -0,0 +1,148 @@
+import struct
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+from .frame_batch import append_frame_log, decode_frames
+
+FRAME = struct.Struct('<HhhH')
+
+OdometrySnapshot = namedtuple('OdometrySnapshot', ['x_total', 'y_total', 'frames', 'timestamp'])
+
+
+class OdometryReader:
+    """Drains a mouse frame source on a background thread.
+
+    Every report lands in a preallocated ring buffer of (timestamp, dx, dy)
+    and is added to the running totals. The totals are published as one
+    immutable ``OdometrySnapshot`` per frame, so ``snapshot()`` never waits
+    on the reader and always sees a consistent (x, y, frames) triple.
+    ``source`` is anything with ``read_frame(timeout_ms)`` returning 8 bytes
+    or None, e.g. ``MouseSensor`` or ``ReplayMouse``; if it also offers
+    ``read_frames`` the frames are read and decoded in batches. With a
+    ``recorder`` (``telemetry.TelemetryRecorder``) every frame is logged too,
+    and ``frame_log`` names a file that gets the raw reports appended, for
+    ``python -m sensors.frame_batch`` or ``ReplayMouse`` later.
+    """
+
+    def __init__(self, source, capacity=4096, read_timeout=100, batch_size=64, recorder=None,
+                 frame_log=None):
+        self.source = source
+        self.capacity = capacity
+        self.read_timeout = read_timeout
+        self.batch_size = batch_size
+        self.recorder = recorder
+        self.frame_log = frame_log
+        self._frame_log_file = None
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.dx = np.zeros(capacity, dtype=np.int32)
+        self.dy = np.zeros(capacity, dtype=np.int32)
+        self.count = 0
+        self.errors = 0
+        self.state = OdometrySnapshot(0, 0, 0, None)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            if self.frame_log is not None and self._frame_log_file is None:
+                self._frame_log_file = open(self.frame_log, 'ab')
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='odometry-reader',
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._frame_log_file is not None:
+            self._frame_log_file.close()
+            self._frame_log_file = None
+
+    def _run(self):
+        # Sources that can hand over several frames at once are decoded in bulk
+        read_frames = getattr(self.source, 'read_frames', None)
+        while not self._stop.is_set():
+            try:
+                if read_frames is not None:
+                    data = read_frames(self.batch_size, self.read_timeout)
+                else:
+                    data = self.source.read_frame(self.read_timeout)
+            except Exception as e:
+                self.errors += 1
+                print(f"Odometry read error: {e}")
+                self._stop.wait(0.1)
+                continue
+            if data is None:
+                continue
+            if read_frames is not None:
+                self.push_batch(time.monotonic(), data)
+            elif len(data) == FRAME.size:
+                self.push(time.monotonic(), data)
+
+    def push(self, timestamp, data):
+        data = bytes(data)
+        _, dx, dy, _ = FRAME.unpack(data)
+        if self.recorder is not None:
+            self.recorder.record_frames(timestamp, decode_frames(data))
+        if self._frame_log_file is not None:
+            append_frame_log(self._frame_log_file, data)
+        i = self.count % self.capacity
+        self.times[i] = timestamp
+        self.dx[i] = dx
+        self.dy[i] = dy
+        previous = self.state
+        self.count += 1
+        # Single reference assignment: readers see the old or the new state
+        self.state = OdometrySnapshot(previous.x_total + dx, previous.y_total + dy,
+                                      self.count, timestamp)
+
+    def push_batch(self, timestamp, buffer):
+        frames = decode_frames(buffer)
+        n = len(frames)
+        if n == 0:
+            return
+        if self.recorder is not None:
+            self.recorder.record_frames(timestamp, frames)
+        if self._frame_log_file is not None:
+            append_frame_log(self._frame_log_file, buffer)
+        dx = frames['x']
+        dy = frames['y']
+        kept = min(n, self.capacity)
+        index = (self.count + np.arange(n - kept, n)) % self.capacity
+        self.times[index] = timestamp
+        self.dx[index] = dx[n - kept:]
+        self.dy[index] = dy[n - kept:]
+        previous = self.state
+        self.count += n
+        self.state = OdometrySnapshot(previous.x_total + int(dx.sum()),
+                                      previous.y_total + int(dy.sum()),
+                                      self.count, timestamp)
+
+    def snapshot(self):
+        return self.state
+
+    def frames_since(self, seq):
+        """Return (times, dx, dy, next_seq, dropped) for frames after seq.
+
+        ``dropped`` counts frames that were overwritten in the ring before
+        this consumer got to them.
+        """
+        count = self.count
+        start = max(seq, count - self.capacity)
+        index = np.arange(start, count) % self.capacity
+        times = self.times[index]
+        dx = self.dx[index]
+        dy = self.dy[index]
+        # The writer may have lapped the oldest slots while we were copying
+        overwritten = self.count - self.capacity - start
+        if overwritten > 0:
+            times, dx, dy = times[overwritten:], dx[overwritten:], dy[overwritten:]
+            start += overwritten
+        return times, dx, dy, count, start - seq
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
@@ -0,0 +1,115 @@
+import math
+import numpy as np
+
+
+class PoseEstimator:
+    """Continuous (x, y, heading) pose with covariance, in metres and radians.
+
+    x runs along map columns and y along map rows, with cell (row, col)
+    centred at (col * resolution, row * resolution). Mouse counts are
+    converted with a per-axis counts-per-mm calibration, rotated by the
+    heading and integrated without rounding; the pose is snapped to a cell
+    only when the planner asks for one. Absolute position or heading
+    measurements are fused with a Kalman update.
+    """
+
+    def __init__(self, resolution, start_cell=(0, 0), heading=0.0,
+                 counts_per_mm=(39, 39), drift_std=0.02, heading_drift_std=0.01):
+        self.resolution = resolution
+        self.counts_per_mm_x, self.counts_per_mm_y = counts_per_mm
+        # Standard deviations accumulated per metre travelled (random walk)
+        self.drift_std = drift_std
+        self.heading_drift_std = heading_drift_std
+        self.state = np.array([start_cell[1] * resolution,
+                               start_cell[0] * resolution,
+                               heading], dtype=np.float64)
+        self.covariance = np.zeros((3, 3))
+        self.distance_travelled = 0.0
+
+    @property
+    def x(self):
+        return float(self.state[0])
+
+    @property
+    def y(self):
+        return float(self.state[1])
+
+    @property
+    def heading(self):
+        return float(self.state[2])
+
+    def calibrate(self, counts_per_mm_x, counts_per_mm_y=None):
+        self.counts_per_mm_x = counts_per_mm_x
+        self.counts_per_mm_y = counts_per_mm_x if counts_per_mm_y is None else counts_per_mm_y
+
+    def update_odometry(self, dx_counts, dy_counts):
+        """Predict step for a body-frame displacement reported by the mouse."""
+        dx = dx_counts / self.counts_per_mm_x / 1000
+        dy = dy_counts / self.counts_per_mm_y / 1000
+        if dx == 0 and dy == 0:
+            return
+        heading = self.state[2]
+        c = math.cos(heading)
+        s = math.sin(heading)
+        self.state[0] += c * dx - s * dy
+        self.state[1] += s * dx + c * dy
+
+        distance = math.hypot(dx, dy)
+        self.distance_travelled += distance
+        jacobian = np.array([
+            [1.0, 0.0, -s * dx - c * dy],
+            [0.0, 1.0, c * dx - s * dy],
+            [0.0, 0.0, 1.0],
+        ])
+        translation_var = self.drift_std ** 2 * distance
+        heading_var = self.heading_drift_std ** 2 * distance
+        noise = np.diag([translation_var, translation_var, heading_var])
+        self.covariance = jacobian @ self.covariance @ jacobian.T + noise
+
+    def _correct(self, measurement, observation, variances):
+        innovation = measurement - observation @ self.state
+        if observation.shape[0] == 1 and observation[0, 2] == 1:
+            innovation = (innovation + math.pi) % (2 * math.pi) - math.pi
+        innovation_cov = observation @ self.covariance @ observation.T + np.diag(variances)
+        gain = self.covariance @ observation.T @ np.linalg.inv(innovation_cov)
+        self.state = self.state + gain @ innovation
+        self.covariance = (np.eye(3) - gain @ observation) @ self.covariance
+
+    def correct_position(self, x, y, variance):
+        """Fuse an absolute position fix, e.g. a known POI location."""
+        observation = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+        self._correct(np.array([x, y]), observation, [variance, variance])
+
+    def correct_heading(self, heading, variance):
+        """Fuse an absolute heading, e.g. from a gyro or compass."""
+        observation = np.array([[0.0, 0.0, 1.0]])
+        self._correct(np.array([heading]), observation, [variance])
+
+    def reset(self, cell, heading=None):
+        self.state[0] = cell[1] * self.resolution
+        self.state[1] = cell[0] * self.resolution
+        if heading is not None:
+            self.state[2] = heading
+        self.covariance = np.zeros((3, 3))
+
+    def clamp_to_cell(self, cell, margin=0.1):
+        """Shortest move that puts the pose inside ``cell``.
+
+        Stops ``margin`` (a fraction of a cell) short of the cell's edges, so
+        ``cell()`` rounds to it; a pose already inside does not move.
+        """
+        reach = self.resolution * (0.5 - margin)
+        for axis, centre in ((0, cell[1] * self.resolution), (1, cell[0] * self.resolution)):
+            self.state[axis] = min(max(self.state[axis], centre - reach), centre + reach)
+
+    def cell(self):
+        # Nearest cell centre; only the planner needs the grid
+        return (int(round(self.state[1] / self.resolution)),
+                int(round(self.state[0] / self.resolution)))
+
+    def distance_to_cell(self, cell):
+        return math.hypot(cell[1] * self.resolution - self.state[0],
+                          cell[0] * self.resolution - self.state[1])
+
+    def position_std(self):
+        return math.sqrt(max(self.covariance[0, 0], self.covariance[1, 1]))
@@ -0,0 +1,59 @@
+import time
+from .frame_batch import FRAME_SIZE, load_frame_log
+
+
+class ReplayMouse:
+    """Frame source that plays back recorded mouse reports.
+
+    ``frames`` holds raw 8-byte reports, or (timestamp, report) pairs when
+    ``realtime`` should reproduce the recorded spacing. Offers the same
+    ``read_frame``/``close`` interface as ``MouseSensor``, so it can stand
+    in for the USB device.
+    """
+
+    def __init__(self, frames, realtime=False, loop=False):
+        self.frames = list(frames)
+        self.realtime = realtime
+        self.loop = loop
+        self.position = 0
+        self.started = None
+
+    @classmethod
+    def from_frame_log(cls, path, loop=False):
+        # A raw log as OdometryReader(frame_log=...) writes it; no timestamps
+        data = load_frame_log(path, mmap=False).tobytes()
+        return cls([data[i:i + FRAME_SIZE] for i in range(0, len(data), FRAME_SIZE)], loop=loop)
+
+    @property
+    def exhausted(self):
+        return not self.loop and self.position >= len(self.frames)
+
+    def read_frame(self, timeout=1000):
+        if not self.frames or self.exhausted:
+            # Behave like an idle device: wait out the timeout, return nothing
+            time.sleep(min(timeout, 50) / 1000)
+            return None
+        frame = self.frames[self.position % len(self.frames)]
+        self.position += 1
+        if isinstance(frame, tuple):
+            timestamp, frame = frame
+            if self.realtime:
+                if self.started is None:
+                    self.started = time.monotonic() - timestamp
+                delay = self.started + timestamp - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+        return bytes(frame)
+
+    def read_frames(self, max_frames=64, timeout=1000):
+        frames = []
+        frame = self.read_frame(timeout)
+        while frame is not None:
+            frames.append(frame)
+            if len(frames) >= max_frames or self.realtime or self.exhausted:
+                break
+            frame = self.read_frame(timeout)
+        return b''.join(frames)
+
+    def close(self):
+        pass
@@ -0,0 +1,2 @@
+from .simulated_robot import SimulatedRobot
+from .station_server import FakeStationServer
\ No newline at end of file
@@ -0,0 +1,196 @@
+import math
+import queue
+import struct
+import threading
+import time
+import numpy as np
+from comms.motion_protocol import CommandEncoder, OBSTACLE_CODE, decode_command
+
+FRAME = struct.Struct('<HhhH')
+
+# Unit vectors in map x (columns) / y (rows) for the single-letter commands
+DIRECTIONS = {
+    'F': (0, -1),  # UP
+    'B': (0, 1),   # DOWN
+    'L': (-1, 0),  # LEFT
+    'R': (1, 0),   # RIGHT
+}
+
+
+class SimulatedRobot:
+    """Stand-in for both the Arduino link and the USB mouse.
+
+    Takes commands like ``SerialTransport`` does (``send``/``send_stop``/
+    ``write``), in either the bare one-letter form or the framed
+    ``#<seq><code><args>`` form from ``CommandEncoder``, and drives a point
+    robot through the map at ``speed`` m/s. Its motion comes back out of
+    ``read_frame``/``read_frames`` as 8-byte mouse reports, one per
+    ``frame_interval``, with a per-frame scale error (``scale_noise``,
+    relative std) and additive ``count_noise`` (counts std). Entering an
+    occupied cell stops the robot, counts a bump and, with ``report_bumps``,
+    puts an obstacle report (``#<seq>O<dx>,<dy>``, mm from the robot to the
+    cell it hit) on ``incoming`` like the firmware would. Simulated time runs
+    ``time_scale`` times faster than the wall clock.
+    """
+
+    def __init__(self, indoor_map, start_cell=None, speed=0.3, counts_per_mm=39,
+                 frame_interval=0.008, scale_noise=0.01, count_noise=0.5,
+                 time_scale=1.0, seed=None, report_bumps=True):
+        self.indoor_map = indoor_map
+        self.resolution = indoor_map.resolution
+        start_cell = indoor_map.current_location if start_cell is None else start_cell
+        self.x = start_cell[1] * self.resolution
+        self.y = start_cell[0] * self.resolution
+        self.speed = speed
+        self.counts_per_mm = counts_per_mm
+        self.frame_interval = frame_interval
+        self.scale_noise = scale_noise
+        self.count_noise = count_noise
+        self.time_scale = time_scale
+        self.report_bumps = report_bumps
+        self.report_encoder = CommandEncoder()
+        self.rng = np.random.default_rng(seed)
+        self.port = 'sim://robot'
+        self.incoming = queue.Queue()
+        self.link_lost = False
+        self.received = []
+        self.bumps = 0
+        self.frames_sent = 0
+        self.distance_travelled = 0.0
+        self.velocity = (0.0, 0.0)
+        self.remaining = None  # metres left of a framed move, None: until told
+        self.pending_counts = [0.0, 0.0]
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._last_update = 0.0
+        self._next_frame = 0.0
+        self.closed = False
+
+    def sim_time(self):
+        return (time.monotonic() - self._started) * self.time_scale
+
+    def cell(self):
+        return (int(round(self.y / self.resolution)), int(round(self.x / self.resolution)))
+
+    def __bool__(self):
+        return not self.closed
+
+    def _advance(self, now):
+        dt = now - self._last_update
+        self._last_update = now
+        vx, vy = self.velocity
+        if dt <= 0 or (vx == 0 and vy == 0):
+            return
+        step = self.speed * dt
+        if self.remaining is not None:
+            step = min(step, self.remaining)
+            self.remaining -= step
+        new_x = self.x + vx * step
+        new_y = self.y + vy * step
+        row = int(round(new_y / self.resolution))
+        col = int(round(new_x / self.resolution))
+        occupancy = self.indoor_map.occupancy
+        if (not (0 <= row < occupancy.shape[0] and 0 <= col < occupancy.shape[1])
+                or occupancy[row, col]):
+            self.bumps += 1
+            self.velocity = (0.0, 0.0)
+            self.remaining = None
+            if self.report_bumps:
+                dx_mm = (col * self.resolution - self.x) * 1000
+                dy_mm = (row * self.resolution - self.y) * 1000
+                self.incoming.put(self.report_encoder.encode(OBSTACLE_CODE, dx_mm, dy_mm)[1])
+            return
+        self.x, self.y = new_x, new_y
+        self.distance_travelled += step
+        self.pending_counts[0] += vx * step * 1000 * self.counts_per_mm
+        self.pending_counts[1] += vy * step * 1000 * self.counts_per_mm
+        if self.remaining is not None and self.remaining <= 0:
+            self.velocity = (0.0, 0.0)
+            self.remaining = None
+
+    def _drive(self, dx, dy, distance=None):
+        length = math.hypot(dx, dy)
+        if length == 0 or distance == 0:
+            self.velocity = (0.0, 0.0)
+            self.remaining = None
+            return
+        self.velocity = (dx / length, dy / length)
+        self.remaining = distance
+
+    def send(self, frame, seq=None, key=None, force=False):
+        with self._lock:
+            self._advance(self.sim_time())
+            self._execute(bytes(frame))
+
+    def write(self, data):
+        self.send(data)
+        return len(data)
+
+    def send_stop(self):
+        self.send(b'S')
+
+    def _execute(self, frame):
+        if not frame.startswith(b'#'):
+            for code in frame.decode(errors='replace').strip():
+                self.received.append(code)
+                if code in DIRECTIONS:
+                    self._drive(*DIRECTIONS[code])
+                elif code == 'S':
+                    self._drive(0, 0)
+            return
+        command = decode_command(frame)
+        if command is None:
+            return
+        self.received.append(command)
+        code, args = command.code, command.args
+        if code in DIRECTIONS and args:
+            self._drive(*DIRECTIONS[code], distance=args[0] / 1000)
+        elif code == 'V' and len(args) == 2:
+            self._drive(args[0], args[1], math.hypot(*args) / 1000)
+        elif code == 'S':
+            self._drive(0, 0)
+        if code != 'H':
+            self.incoming.put(f"#{command.seq:02X}K\n".encode())
+
+    def read_frame(self, timeout=1000):
+        # Paced like a USB mouse: one report per frame_interval of sim time,
+        # nothing (after the wait) while the robot stands still
+        wait = max(0.0, (self._next_frame - self.sim_time()) / self.time_scale)
+        if wait > timeout / 1000:
+            time.sleep(timeout / 1000)
+            return None
+        if wait:
+            time.sleep(wait)
+        with self._lock:
+            now = self.sim_time()
+            self._next_frame = now + self.frame_interval
+            self._advance(now)
+            counts_x, counts_y = self.pending_counts
+            # A report holds at most an int16 per axis; like the real sensor,
+            # motion beyond that (and the sub-count residue) carries over to
+            # the next one. The noise is the sensor's own error and does not.
+            whole_x = max(-30000, min(30000, round(counts_x)))
+            whole_y = max(-30000, min(30000, round(counts_y)))
+            if not (whole_x or whole_y):
+                return None
+            self.pending_counts = [counts_x - whole_x, counts_y - whole_y]
+            dx = self._noisy(whole_x)
+            dy = self._noisy(whole_y)
+            self.frames_sent += 1
+            return FRAME.pack(1, dx, dy, 0)
+
+    def _noisy(self, counts):
+        if not counts:
+            return 0
+        if self.scale_noise:
+            counts = counts * (1 + self.rng.normal(0, self.scale_noise))
+        if self.count_noise:
+            counts += self.rng.normal(0, self.count_noise)
+        return int(max(-32768, min(32767, round(counts))))
+
+    def read_frames(self, max_frames=64, timeout=1000):
+        frame = self.read_frame(timeout)
+        return frame or b''
+
+    def close(self, flush_timeout=0):
+        self.closed = True
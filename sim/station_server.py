@@ -0,0 +1,80 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeStationServer:
+    """Local HTTP server that answers ``/available`` like the station server.
+
+    Replies ``{"station": <id>}`` with whatever ``set_station`` last set.
+    Long-poll requests (``wait``/``last`` parameters, see StationPoller)
+    are held until the station differs from ``last`` or ``wait`` runs out.
+    ``port=0`` picks a free port; ``url`` is what to give the poller.
+    To misbehave, every reply can be held for ``delay`` seconds, sent with
+    ``status``, or carry ``body`` (raw text, e.g. ``'null'``) instead of
+    the station.
+    """
+
+    def __init__(self, station=None, host='127.0.0.1', port=0):
+        self.station = station
+        self.delay = 0.0
+        self.status = 200
+        self.body = None
+        self.requests = 0
+        self._changed = threading.Condition()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != '/available':
+                    self.send_error(404)
+                    return
+                server.requests += 1
+                params = parse_qs(url.query)
+                if 'wait' in params:
+                    server.wait_for_change(params.get('last', [None])[0],
+                                           float(params['wait'][0]))
+                if server.delay:
+                    time.sleep(server.delay)
+                if server.body is None:
+                    body = json.dumps({'station': server.station}).encode()
+                else:
+                    body = server.body.encode()
+                self.send_response(server.status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}/available"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever,
+                                        name='fake-station-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def set_station(self, station):
+        with self._changed:
+            self.station = station
+            self._changed.notify_all()
+
+    def wait_for_change(self, last, timeout):
+        with self._changed:
+            self._changed.wait_for(lambda: str(self.station) != last, timeout)
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
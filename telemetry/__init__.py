@@ -0,0 +1,2 @@
+from .recorder import TelemetryRecorder, TelemetryLog, RECORD_DTYPE
+from .replay import TelemetryReplay, replay
\ No newline at end of file
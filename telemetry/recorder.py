@@ -0,0 +1,271 @@
+import glob
+import json
+import os
+import struct
+import threading
+import time
+import numpy as np
+
+# One 32-byte record per event. 'time' is seconds since the recorder
+# started; the meaning of the other fields depends on 'kind':
+#   FRAME      flags=id_flag, a=dx counts, b=dy counts
+#   POSE       a=row, b=col, x/y=metres
+#   PATH       index=number of PATH_CELL records that follow, a/b=goal cell
+#   PATH_CELL  index=position in the path, a=row, b=col
+#   COMMAND    code=command letter, index=frame seq, x/y=mm (distance in x)
+#   POI        index=position in the header's 'pois' list, a/b=its cell
+#   CELL       a=row, b=col, flags=1 if the cell became occupied, 0 if freed
+RECORD_DTYPE = np.dtype([
+    ('time', '<f8'),
+    ('kind', 'u1'),
+    ('code', 'u1'),
+    ('flags', '<u2'),
+    ('index', '<u4'),
+    ('a', '<i4'),
+    ('b', '<i4'),
+    ('x', '<f4'),
+    ('y', '<f4'),
+])
+RECORD_SIZE = RECORD_DTYPE.itemsize
+
+FRAME = 1
+POSE = 2
+PATH = 3
+PATH_CELL = 4
+COMMAND = 5
+POI = 6
+CELL = 7
+KINDS = {'frame': FRAME, 'pose': POSE, 'path': PATH, 'path_cell': PATH_CELL,
+         'command': COMMAND, 'poi': POI, 'cell': CELL}
+
+NO_POI = 0xFFFFFFFF
+
+# Segment file: magic, format version, record size, header length; then the
+# JSON header, padded so the records start on a record boundary
+MAGIC = b'RMTL'
+VERSION = 1
+PREAMBLE = struct.Struct('<4sHHI')
+SEGMENT_PATTERN = 'segment_{:05d}.rmt'
+
+
+class TelemetryRecorder:
+    """Appends fixed-size binary event records to a directory of segments.
+
+    Records are collected in a small preallocated buffer and written out
+    when it fills, every ``flush_interval`` seconds, or on ``flush``/
+    ``close``; a new segment is started every ``segment_records`` records.
+    Each segment carries its own header (field layout, kind codes and
+    ``meta``), so any one of them can be memory-mapped and read on its own
+    with ``TelemetryLog``. Safe to call from several threads.
+    """
+
+    def __init__(self, directory, meta=None, segment_records=1 << 16, buffer_records=1024,
+                 flush_interval=1.0):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.meta = dict(meta or {})
+        self.pois = [str(poi) for poi in self.meta.get('pois', [])]
+        self.segment_records = segment_records
+        self.flush_interval = flush_interval
+        self.started = time.monotonic()
+        self.wall_started = time.time()
+        self.buffer = np.zeros(buffer_records, dtype=RECORD_DTYPE)
+        self.buffered = 0
+        self.records = 0
+        self.segment = -1
+        self.segment_filled = segment_records  # forces a segment on first write
+        self.file = None
+        self.last_flush = self.started
+        self._lock = threading.Lock()
+
+    def now(self):
+        return time.monotonic() - self.started
+
+    def _header(self):
+        header = {
+            'version': VERSION,
+            'fields': [[name, RECORD_DTYPE.fields[name][0].str] for name in RECORD_DTYPE.names],
+            'kinds': KINDS,
+            'segment': self.segment,
+            'started': self.wall_started,
+            'meta': self.meta,
+        }
+        text = json.dumps(header).encode()
+        padding = -(PREAMBLE.size + len(text)) % RECORD_SIZE
+        return PREAMBLE.pack(MAGIC, VERSION, RECORD_SIZE, len(text) + padding) + text + b' ' * padding
+
+    def _open_segment(self):
+        if self.file is not None:
+            self.file.close()
+        self.segment += 1
+        self.segment_filled = 0
+        path = os.path.join(self.directory, SEGMENT_PATTERN.format(self.segment))
+        self.file = open(path, 'wb')
+        self.file.write(self._header())
+
+    def _write(self, records):
+        # Caller holds the lock
+        while len(records):
+            if self.segment_filled >= self.segment_records:
+                self._open_segment()
+            n = min(len(records), self.segment_records - self.segment_filled)
+            self.file.write(records[:n].tobytes())
+            self.segment_filled += n
+            records = records[n:]
+
+    def _flush_locked(self):
+        if self.buffered:
+            self._write(self.buffer[:self.buffered])
+            self.buffered = 0
+        if self.file is not None:
+            self.file.flush()
+        self.last_flush = time.monotonic()
+
+    def _append(self, records):
+        with self._lock:
+            if self.buffered + len(records) > len(self.buffer):
+                self._flush_locked()
+            if len(records) > len(self.buffer):
+                self._write(records)
+            else:
+                self.buffer[self.buffered:self.buffered + len(records)] = records
+                self.buffered += len(records)
+            self.records += len(records)
+            if time.monotonic() - self.last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def record(self, kind, t=None, code=0, flags=0, index=0, a=0, b=0, x=0.0, y=0.0):
+        with self._lock:
+            if self.buffered == len(self.buffer):
+                self._flush_locked()
+            self.buffer[self.buffered] = (self.now() if t is None else t, kind, code, flags,
+                                          index, a, b, x, y)
+            self.buffered += 1
+            self.records += 1
+            if time.monotonic() - self.last_flush >= self.flush_interval:
+                self._flush_locked()
+
+    def record_frames(self, timestamp, frames):
+        # frames: FRAME_DTYPE array from sensors.frame_batch, all stamped with
+        # the monotonic time they were read at
+        records = np.zeros(len(frames), dtype=RECORD_DTYPE)
+        records['time'] = timestamp - self.started
+        records['kind'] = FRAME
+        records['flags'] = frames['id_flag']
+        records['a'] = frames['x']
+        records['b'] = frames['y']
+        self._append(records)
+
+    def record_pose(self, cell, x, y):
+        self.record(POSE, a=cell[0], b=cell[1], x=x, y=y)
+
+    def record_path(self, path):
+        # A PATH record and its cells are written as one block, so readers
+        # always find the cells right after their header
+        cells = np.asarray(path, dtype=np.int32).reshape(-1, 2)
+        records = np.zeros(len(cells) + 1, dtype=RECORD_DTYPE)
+        records['time'] = self.now()
+        records['kind'][0] = PATH
+        records['index'][0] = len(cells)
+        if len(cells):
+            records['a'][0], records['b'][0] = cells[-1]
+        records['kind'][1:] = PATH_CELL
+        records['index'][1:] = np.arange(len(cells))
+        records['a'][1:] = cells[:, 0]
+        records['b'][1:] = cells[:, 1]
+        self._append(records)
+
+    def record_command(self, code, seq=0, x=0.0, y=0.0):
+        self.record(COMMAND, code=ord(code), index=seq or 0, x=x, y=y)
+
+    def record_poi(self, poi, cell):
+        index = self.pois.index(str(poi)) if str(poi) in self.pois else NO_POI
+        self.record(POI, index=index, a=cell[0], b=cell[1])
+
+    def record_cells(self, rows, cols, occupied):
+        # Map edits (e.g. from OccupancyMapper), one record per changed cell
+        rows = np.asarray(rows)
+        records = np.zeros(len(rows), dtype=RECORD_DTYPE)
+        records['time'] = self.now()
+        records['kind'] = CELL
+        records['flags'] = occupied
+        records['a'] = rows
+        records['b'] = cols
+        self._append(records)
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def read_segment(path, mmap=True):
+    """(header, records) of one segment file; records are memory-mapped.
+
+    A trailing partial record (a segment still being written) is ignored.
+    """
+    with open(path, 'rb') as f:
+        magic, version, record_size, header_len = PREAMBLE.unpack(f.read(PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a telemetry segment")
+        if version != VERSION or record_size != RECORD_SIZE:
+            raise ValueError(f"{path}: unsupported telemetry format {version}/{record_size}")
+        header = json.loads(f.read(header_len))
+    offset = PREAMBLE.size + header_len
+    count = (os.path.getsize(path) - offset) // RECORD_SIZE
+    if mmap and count:
+        records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=offset, shape=(count,))
+    else:
+        records = np.fromfile(path, dtype=RECORD_DTYPE, count=count, offset=offset)
+    return header, records
+
+
+class TelemetryLog:
+    """Read side of a ``TelemetryRecorder`` directory.
+
+    ``records`` is all segments in order (a memory map when there is only
+    one segment, one concatenated copy otherwise); ``meta`` and ``pois``
+    come from the first segment's header.
+    """
+
+    def __init__(self, directory, mmap=True):
+        paths = sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN.replace('{:05d}', '*'))))
+        if not paths:
+            raise FileNotFoundError(f"No telemetry segments in {directory}")
+        segments = [read_segment(path, mmap) for path in paths]
+        self.header = segments[0][0]
+        self.meta = self.header['meta']
+        self.pois = [str(poi) for poi in self.meta.get('pois', [])]
+        self.segments = [records for _, records in segments]
+        if len(self.segments) == 1:
+            self.records = self.segments[0]
+        else:
+            self.records = np.concatenate(self.segments)
+
+    def __len__(self):
+        return len(self.records)
+
+    def of_kind(self, kind):
+        return self.records[self.records['kind'] == kind]
+
+    def duration(self):
+        return float(self.records['time'].max()) if len(self.records) else 0.0
+
+    def path_at(self, i):
+        # Cells of the PATH record at position i, as a list of (row, col)
+        n = int(self.records['index'][i])
+        cells = self.records[i + 1:i + 1 + n]
+        return list(zip(cells['a'].tolist(), cells['b'].tolist()))
+
+    def paths(self):
+        return [(float(self.records['time'][i]), self.path_at(i))
+                for i in np.flatnonzero(self.records['kind'] == PATH)]
+
+    def poi_name(self, index):
+        return self.pois[index] if index < len(self.pois) else None
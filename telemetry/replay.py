@@ -0,0 +1,155 @@
+import os
+import sys
+import time
+import numpy as np
+import pygame
+from maps.indoor_map import IndoorMap
+from maps.map_io import load_map
+from sensors.pose_estimator import PoseEstimator
+from gui.map_renderer import MapRenderer
+from .recorder import TelemetryLog, FRAME, POSE, PATH, COMMAND, POI, CELL
+
+
+class TelemetryReplay:
+    """Feeds a recorded run back through the planner and the map renderer.
+
+    Records are applied in order: poses move the robot cell, POI changes
+    set the active POI, map edits go through ``set_cells``, recorded paths
+    are drawn and re-planned from the same start to the same goal with the
+    planner the header names (a different path cost counts as a mismatch),
+    and the raw mouse frames are integrated again by a fresh
+    ``PoseEstimator``. ``speed`` is the replay rate relative to the
+    recording (None: as fast as possible); frames are rendered every
+    ``1 / render_fps`` seconds of recorded time.
+    """
+
+    def __init__(self, log, indoor_map, screen=None, cell_size=10, speed=None, render_fps=30):
+        self.log = log
+        self.indoor_map = indoor_map
+        self.speed = speed
+        self.render_fps = render_fps
+        self.renderer = MapRenderer(screen, indoor_map, cell_size) if screen is not None else None
+        if self.renderer is not None:
+            indoor_map.occupancy_listeners.append(self.renderer.cells_changed)
+        # 'replan' (D* Lite, as the GUI uses) or a find_path method
+        self.planner = log.meta.get('planner', 'replan')
+        counts_per_mm = log.meta.get('counts_per_mm', 39)
+        self.pose = PoseEstimator(indoor_map.resolution, indoor_map.current_location,
+                                  counts_per_mm=(counts_per_mm, counts_per_mm))
+        self.path = None
+        self.stats = {'records': 0, 'frames': 0, 'poses': 0, 'commands': 0, 'poi_changes': 0,
+                      'cells': 0, 'paths': 0, 'path_mismatches': 0, 'rendered': 0}
+
+    def plan(self, start, goal):
+        if self.planner == 'replan':
+            return self.indoor_map.replan(start, goal)
+        return self.indoor_map.find_path(start, goal, method=self.planner)
+
+    def path_cost(self, path):
+        # What the planners minimise: one per step plus the costmap's cost
+        costmap = self.indoor_map.costmap
+        steps = len(path) - 1
+        if costmap is None or steps < 1:
+            return steps
+        rows, cols = np.array(path[1:]).T
+        return steps + int(costmap.step_cost[rows, cols].sum())
+
+    def run(self):
+        records = self.log.records
+        # Pull the columns out once; per-record access to a memmap is slow
+        times = records['time'].tolist()
+        kinds = records['kind'].tolist()
+        a = records['a'].tolist()
+        b = records['b'].tolist()
+        index = records['index'].tolist()
+        xs = records['x'].tolist()
+        ys = records['y'].tolist()
+        flags = records['flags'].tolist()
+        stats = self.stats
+        indoor_map = self.indoor_map
+        started = time.monotonic()
+        next_frame = 0.0
+        last_pose = None
+        edits = []  # consecutive CELL records, applied as one set_cells
+        for i, kind in enumerate(kinds):
+            if edits and kind != CELL:
+                self.apply_edits(edits)
+                edits = []
+            t = times[i]
+            if self.speed:
+                delay = started + t / self.speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            if kind == FRAME:
+                self.pose.update_odometry(a[i], b[i])
+                stats['frames'] += 1
+            elif kind == POSE:
+                indoor_map.update_current_location((a[i], b[i]))
+                last_pose = (xs[i], ys[i])
+                stats['poses'] += 1
+            elif kind == POI:
+                name = self.log.poi_name(index[i])
+                if name is not None:
+                    indoor_map.set_active_pois([name])
+                stats['poi_changes'] += 1
+            elif kind == CELL:
+                edits.append((a[i], b[i], flags[i]))
+                stats['cells'] += 1
+            elif kind == PATH:
+                self.path = self.log.path_at(i)
+                stats['paths'] += 1
+                if len(self.path) > 1:
+                    replanned = self.plan(self.path[0], self.path[-1])
+                    # Equal-cost alternatives are fine; only the cost must match
+                    if not replanned or self.path_cost(replanned) != self.path_cost(self.path):
+                        stats['path_mismatches'] += 1
+            elif kind == COMMAND:
+                stats['commands'] += 1
+            stats['records'] += 1
+            if self.renderer is not None and t >= next_frame:
+                pygame.event.pump()
+                self.renderer.draw(self.path)
+                stats['rendered'] += 1
+                next_frame = t + 1 / self.render_fps
+        if edits:
+            self.apply_edits(edits)
+        stats['wall_s'] = time.monotonic() - started
+        stats['recorded_s'] = self.log.duration()
+        if last_pose is not None:
+            # How far the re-integrated frames ended up from the recorded pose
+            stats['pose_error_m'] = ((self.pose.x - last_pose[0]) ** 2 +
+                                     (self.pose.y - last_pose[1]) ** 2) ** 0.5
+        return stats
+
+    def apply_edits(self, edits):
+        rows, cols, occupied = zip(*edits)
+        self.indoor_map.set_cells(rows, cols, np.array(occupied, dtype=bool))
+
+
+def replay(log_dir, map_path=None, speed=None, headless=False):
+    log = TelemetryLog(log_dir)
+    map_path = map_path or log.meta.get('map_path')
+    indoor_map = load_map(map_path) if map_path else IndoorMap()
+    if log.meta.get('costmap'):
+        indoor_map.enable_costmap(**log.meta['costmap'])
+    start = log.meta.get('start')
+    if start is not None:
+        indoor_map.update_current_location(tuple(start))
+    if headless:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    pygame.init()
+    cell_size = 10
+    screen = pygame.display.set_mode((indoor_map.cols * cell_size, indoor_map.rows * cell_size))
+    pygame.display.set_caption(f"Replay {log_dir}")
+    try:
+        return TelemetryReplay(log, indoor_map, screen, cell_size, speed).run()
+    finally:
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    # python -m telemetry.replay LOG_DIR [SPEED] [MAP]
+    speed = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    stats = replay(sys.argv[1], sys.argv[3] if len(sys.argv) > 3 else None, speed)
+    for name, value in stats.items():
+        print(f"{name:<16} {value}")
@@ -0,0 +1,155 @@
+import os
+import struct
+import time
+import numpy as np
+from sensors.frame_batch import load_frame_log, summarize
+from sensors.odometry_reader import OdometryReader
+from sensors.replay_mouse import ReplayMouse
+
+FRAME = struct.Struct('<HhhH')
+
+
+def make_frames(n, seed=0):
+    rng = np.random.default_rng(seed)
+    moves = rng.integers(-40, 41, size=(n, 2))
+    return [FRAME.pack(1, int(dx), int(dy), 0) for dx, dy in moves], moves
+
+
+def wait_until(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+class SingleFrameSource:
+    # Only read_frame, so the reader takes its one-frame-at-a-time path
+    def __init__(self, mouse):
+        self.mouse = mouse
+
+    def read_frame(self, timeout=1000):
+        return self.mouse.read_frame(timeout)
+
+
+def test_replay_mouse_plays_back_and_runs_dry():
+    frames, _ = make_frames(5)
+    mouse = ReplayMouse(frames)
+    assert mouse.read_frames(max_frames=3) == b''.join(frames[:3])
+    assert mouse.read_frames() == b''.join(frames[3:])
+    assert mouse.exhausted
+    assert mouse.read_frame(timeout=1) is None
+
+
+def test_replay_mouse_loops():
+    frames, _ = make_frames(3)
+    mouse = ReplayMouse(frames, loop=True)
+    assert [mouse.read_frame() for _ in range(7)] == frames * 2 + frames[:1]
+    assert not mouse.exhausted
+
+
+def test_replay_mouse_realtime_keeps_recorded_spacing():
+    frames, _ = make_frames(3)
+    mouse = ReplayMouse([(0.05 * i, frame) for i, frame in enumerate(frames)], realtime=True)
+    t0 = time.monotonic()
+    assert mouse.read_frames() == frames[0]  # one frame per call in realtime
+    while not mouse.exhausted:
+        mouse.read_frames()
+    assert time.monotonic() - t0 >= 0.09
+
+
+def test_reader_totals_match_the_replayed_frames():
+    frames, moves = make_frames(500)
+    for source in (ReplayMouse(frames), SingleFrameSource(ReplayMouse(frames))):
+        reader = OdometryReader(source, read_timeout=10).start()
+        try:
+            assert wait_until(lambda: reader.snapshot().frames == len(frames))
+        finally:
+            reader.stop()
+        snapshot = reader.snapshot()
+        assert (snapshot.x_total, snapshot.y_total) == tuple(int(v) for v in moves.sum(axis=0))
+
+
+def test_ring_wraps_and_counts_dropped_frames():
+    frames, moves = make_frames(100)
+    reader = OdometryReader(ReplayMouse(frames), capacity=16, read_timeout=10).start()
+    try:
+        assert wait_until(lambda: reader.snapshot().frames == len(frames))
+    finally:
+        reader.stop()
+    _, dx, dy, next_seq, dropped = reader.frames_since(0)
+    assert next_seq == 100
+    assert dropped == 84
+    assert dx.tolist() == moves[84:, 0].tolist()
+    assert dy.tolist() == moves[84:, 1].tolist()
+    # Totals cover every frame, not just the ones still in the ring
+    assert reader.snapshot().x_total == int(moves[:, 0].sum())
+
+
+def test_batch_larger_than_the_ring_keeps_the_newest():
+    frames, moves = make_frames(40)
+    reader = OdometryReader(ReplayMouse([]), capacity=8)
+    reader.push_batch(1.0, b''.join(frames[:5]))
+    reader.push_batch(2.0, b''.join(frames[5:]))
+    times, dx, _, next_seq, dropped = reader.frames_since(0)
+    assert (next_seq, dropped) == (40, 32)
+    assert dx.tolist() == moves[32:, 0].tolist()
+    assert times.tolist() == [2.0] * 8
+
+
+def test_consumer_that_keeps_up_sees_every_frame():
+    frames, moves = make_frames(2000)
+    mouse = ReplayMouse([(i * 0.0005, frame) for i, frame in enumerate(frames)], realtime=True)
+    reader = OdometryReader(mouse, capacity=256, read_timeout=10).start()
+    seq = 0
+    seen = []
+    total_dropped = 0
+    try:
+        while seq < len(frames):
+            _, dx, _, seq, dropped = reader.frames_since(seq)
+            seen.extend(dx.tolist())
+            total_dropped += dropped
+            time.sleep(0.01)
+    finally:
+        reader.stop()
+    assert total_dropped == 0
+    assert seen == moves[:, 0].tolist()
+
+
+def test_consumer_that_falls_behind_catches_up_with_the_newest():
+    frames, moves = make_frames(64)
+    reader = OdometryReader(ReplayMouse([]), capacity=16)
+    reader.push_batch(0.0, b''.join(frames[:10]))
+    _, dx, _, seq, dropped = reader.frames_since(0)
+    assert (len(dx), seq, dropped) == (10, 10, 0)
+    # Lapped: 54 new frames into a 16-slot ring
+    reader.push_batch(1.0, b''.join(frames[10:]))
+    _, dx, _, seq, dropped = reader.frames_since(seq)
+    assert (seq, dropped) == (64, 38)
+    assert dx.tolist() == moves[48:, 0].tolist()
+    # Caught up again: nothing new, nothing dropped
+    _, dx, _, seq, dropped = reader.frames_since(seq)
+    assert (len(dx), seq, dropped) == (0, 64, 0)
+
+
+def test_frame_log_round_trip(tmp_path):
+    frames, moves = make_frames(300)
+    path = os.path.join(tmp_path, 'frames.bin')
+    for source in (ReplayMouse(frames), SingleFrameSource(ReplayMouse(frames))):
+        reader = OdometryReader(source, read_timeout=10, frame_log=path).start()
+        try:
+            assert wait_until(lambda: reader.snapshot().frames == len(frames))
+        finally:
+            reader.stop()
+    # Both runs appended to the same log
+    summary = summarize(load_frame_log(path), counts_per_mm=10)
+    assert summary['frames'] == 600
+    assert summary['x_total'] == 2 * int(moves[:, 0].sum())
+    assert summary['x_mm'] == summary['x_total'] / 10
+    replayed = OdometryReader(ReplayMouse.from_frame_log(path), read_timeout=10).start()
+    try:
+        assert wait_until(lambda: replayed.snapshot().frames == 600)
+    finally:
+        replayed.stop()
+    assert replayed.snapshot().y_total == summary['y_total']
@@ -0,0 +1,124 @@
+import contextlib
+import io
+import time
+import pytest
+from comms.motion_protocol import CommandEncoder, MotionCommand, decode_command
+from comms.serial_transport import SerialTransport
+
+fake_arduino = pytest.importorskip('comms.fake_arduino')
+
+
+def wait_until(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def arduino():
+    arduino = fake_arduino.FakeArduino()
+    yield arduino
+    arduino.close()
+
+
+@pytest.fixture
+def silent_arduino():
+    # Never acknowledges anything
+    arduino = fake_arduino.FakeArduino(ack=False)
+    yield arduino
+    arduino.close()
+
+
+@pytest.fixture
+def make_transport():
+    transports = []
+
+    def make(device, **kwargs):
+        transport = SerialTransport(device.port, **kwargs)
+        transports.append(transport)
+        return transport
+
+    yield make
+    for transport in transports:
+        transport.close(flush_timeout=0)
+
+
+def test_repeated_keys_are_coalesced(arduino, make_transport):
+    transport = make_transport(arduino)
+    # Queued before the writer runs: the later ones replace the first
+    for _ in range(3):
+        transport.send(b'R', key='RIGHT')
+    transport.open()
+    assert wait_until(lambda: transport.last_key == 'RIGHT')
+    # Same motion as the one already sent
+    transport.send(b'R', key='RIGHT')
+    transport.send(b'L', key='LEFT')
+    assert wait_until(lambda: len(arduino.received) == 2)
+    time.sleep(0.1)
+    assert arduino.received == ['R', 'L']
+    assert transport.coalesced == 3
+
+
+def test_forced_send_is_never_coalesced(arduino, make_transport):
+    transport = make_transport(arduino).open()
+    transport.send(b'R', key='RIGHT')
+    assert wait_until(lambda: transport.last_key == 'RIGHT')
+    transport.send(b'R', key='RIGHT', force=True)
+    transport.send(b'R', key='RIGHT', force=True)
+    assert wait_until(lambda: len(arduino.received) == 3)
+    assert transport.coalesced == 0
+
+
+def test_stop_clears_the_last_key(arduino, make_transport):
+    transport = make_transport(arduino).open()
+    transport.send(b'F', key='UP')
+    assert wait_until(lambda: transport.last_key == 'UP')
+    transport.send_stop()
+    transport.send(b'F', key='UP')
+    assert wait_until(lambda: arduino.received == ['F', 'S', 'F'])
+
+
+def test_framed_commands_are_acknowledged(arduino, make_transport):
+    encoder = CommandEncoder()
+    transport = make_transport(arduino, ack_timeout=1.0, encoder=encoder).open()
+    for distance in (400, 800):
+        seq, frame = encoder.encode_move('UP', distance)
+        transport.send(frame, seq=seq)
+    assert wait_until(lambda: transport.acked == 2)
+    assert transport.pending == {}
+    assert not transport.link_lost
+    assert [command.args for command in arduino.received] == [(400,), (800,)]
+    assert transport.incoming.empty()
+
+
+def test_missing_ack_sends_stop_then_accepts_the_same_motion(silent_arduino, make_transport):
+    encoder = CommandEncoder()
+    transport = make_transport(silent_arduino, ack_timeout=0.2, encoder=encoder).open()
+    seq, frame = encoder.encode_move('RIGHT', 1000)
+    with contextlib.redirect_stdout(io.StringIO()) as log:
+        transport.send(frame, seq=seq, key='RIGHT')
+        assert wait_until(lambda: transport.link_lost)
+    assert 'sending STOP' in log.getvalue()
+    assert wait_until(lambda: silent_arduino.received[-1:] == ['S'])
+    # The robot is standing still now; repeating the motion has to reach it
+    transport.send(frame, seq=seq, key='RIGHT')
+    assert wait_until(lambda: len(silent_arduino.received) == 3)
+    assert silent_arduino.received[2].code == 'R'
+
+
+def test_lines_split_across_reads_are_reassembled(silent_arduino, make_transport):
+    encoder = CommandEncoder()
+    transport = make_transport(silent_arduino, ack_timeout=1.0, encoder=encoder).open()
+    seq, frame = encoder.encode_move('UP', 500)
+    transport.send(frame, seq=seq)
+    assert wait_until(lambda: transport.pending)
+    for part in (f"#{seq:02X}", "K\n#07O1", "20,-", "40\n"):
+        silent_arduino.report(part)
+        time.sleep(0.1)
+    assert wait_until(lambda: transport.acked == 1)
+    line = transport.incoming.get(timeout=1.0)
+    assert transport.incoming.empty()
+    assert decode_command(line) == MotionCommand(7, 'O', (120, -40))
@@ -0,0 +1,105 @@
+import contextlib
+import io
+import os
+import time
+import pytest
+from comms.station_poller import StationPoller
+from sim import FakeStationServer, SimulatedRobot
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def slowest_call(func, repeats=20):
+    worst = 0.0
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        func()
+        worst = max(worst, time.perf_counter() - t0)
+    return worst
+
+
+@pytest.fixture
+def server():
+    server = FakeStationServer(station='1').start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def poller(server):
+    poller = StationPoller(server.url, interval=0.05, timeout=2.0, max_backoff=0.1)
+    yield poller
+    poller.stop()
+
+
+def test_reports_station_changes(server, poller):
+    poller.start()
+    assert wait_until(lambda: poller.latest_station == '1')
+    assert poller.get_update() == '1'
+    assert poller.get_update() is None
+    server.set_station('3')
+    assert wait_until(lambda: poller.latest_station == '3')
+    assert poller.get_update() == '3'
+
+
+def test_slow_server_does_not_block(server, poller):
+    server.delay = 1.0
+    poller.start()
+    assert wait_until(lambda: server.requests > 0)
+    # A request is in flight for the next second
+    assert slowest_call(poller.get_update) < 0.01
+    assert poller.latest_station is None
+    assert wait_until(lambda: poller.latest_station == '1')
+
+
+def test_failing_server_backs_off_and_recovers(server, poller):
+    server.status = 500
+    poller.start()
+    assert wait_until(lambda: poller.failures >= 2)
+    assert slowest_call(poller.get_update) < 0.01
+    assert poller.latest_station is None
+    server.status = 200
+    assert wait_until(lambda: poller.latest_station == '1')
+    assert poller.failures == 0
+
+
+@pytest.mark.parametrize('body', ['null', '["1"]', '"1"', 'not json'])
+def test_unexpected_body_keeps_polling(server, poller, body):
+    server.body = body
+    with contextlib.redirect_stdout(io.StringIO()) as log:
+        poller.start()
+        assert wait_until(lambda: poller.failures >= 2)
+    assert poller._thread.is_alive()
+    assert 'Server communication error' in log.getvalue()
+    server.body = None
+    assert wait_until(lambda: poller.latest_station == '1')
+
+
+def test_gui_poi_check_does_not_wait_for_server(server):
+    pytest.importorskip('pygame')
+    from gui.indoor_map_gui import IndoorMapGUI
+    from maps.indoor_map import IndoorMap
+    server.delay = 1.0
+    server.set_station('2')
+    with contextlib.redirect_stdout(io.StringIO()):
+        gui = IndoorMapGUI(robot=SimulatedRobot(IndoorMap()), station_url=server.url,
+                           headless=True)
+    try:
+        assert slowest_call(gui.check_and_update_poi) < 0.01
+        assert gui.last_known_poi != '2'
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert wait_until(gui.check_and_update_poi)
+        assert gui.last_known_poi == '2'
+        assert gui.active_pois == {'2'}
+    finally:
+        with contextlib.redirect_stdout(io.StringIO()):
+            gui.close()
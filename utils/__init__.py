@@ -1,2 +1,6 @@
+from .profiler import StageProfiler
+from .rate_loop import FixedRateLoop
+
+
 def example_helper():
     pass
\ No newline at end of file
@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+
+# Histogram bucket upper edges in milliseconds; the last bucket is open
+BUCKET_EDGES_MS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class StageTimer:
+    """Durations of one loop stage: a rolling window plus an all-time histogram."""
+
+    def __init__(self, window=512):
+        self.samples = np.zeros(window, dtype=np.float64)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.over_budget = 0
+        self.histogram = np.zeros(len(BUCKET_EDGES_MS) + 1, dtype=np.int64)
+
+    def add(self, seconds, budget=None):
+        self.samples[self.count % len(self.samples)] = seconds
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.histogram[np.searchsorted(BUCKET_EDGES_MS, seconds * 1000)] += 1
+        if budget is not None and seconds > budget:
+            self.over_budget += 1
+
+    def window(self):
+        return self.samples[:min(self.count, len(self.samples))]
+
+    def summary(self):
+        recent = self.window() * 1000
+        if len(recent) == 0:
+            return {'count': 0}
+        p50, p95, p99 = np.percentile(recent, (50, 95, 99))
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000,
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+            'max_ms': self.max * 1000,
+            'over_budget': self.over_budget,
+            'histogram': self.histogram.tolist(),
+        }
+
+
+class StageProfiler:
+    """Monotonic timers around the stages of the main loop, plus counters.
+
+    ``with profiler.stage('draw'): ...`` records one duration; percentiles
+    are over the last ``window`` samples of each stage, the histogram
+    (``BUCKET_EDGES_MS``) over the whole run. Durations above ``budgets``
+    (seconds, per stage name) are counted as misses. ``count`` bumps event
+    counters such as replans or node expansions. With ``export_path`` set,
+    ``maybe_export`` appends a JSON summary line every ``export_interval``
+    seconds. The control thread records while the render thread reports,
+    so both go through ``lock``.
+    """
+
+    def __init__(self, budgets=None, window=512, export_path=None, export_interval=10.0):
+        self.budgets = dict(budgets or {})
+        self.window = window
+        self.export_path = export_path
+        self.export_interval = export_interval
+        self.enabled = True
+        self.timers = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.last_export = self.started
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    def record(self, name, seconds):
+        with self.lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                timer = self.timers[name] = StageTimer(self.window)
+            timer.add(seconds, self.budgets.get(name))
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        with self.lock:
+            stages = {name: timer.summary() for name, timer in self.timers.items()}
+            counters = dict(self.counters)
+        return {
+            'time': time.time(),
+            'uptime_s': time.monotonic() - self.started,
+            'stages': stages,
+            'counters': counters,
+        }
+
+    def report_lines(self):
+        # Compact text for the on-screen overlay
+        with self.lock:
+            stages = [(name, timer.summary()) for name, timer in self.timers.items()]
+            counters = list(self.counters.items())
+        lines = []
+        for name, stats in stages:
+            if stats['count']:
+                lines.append(f"{name:<8} p50 {stats['p50_ms']:6.2f}  p95 {stats['p95_ms']:6.2f}  "
+                             f"max {stats['max_ms']:7.1f} ms  miss {stats['over_budget']}")
+        for name, value in counters:
+            lines.append(f"{name:<8} {value}")
+        return lines
+
+    def export(self, path=None):
+        with open(path or self.export_path, 'a') as f:
+            f.write(json.dumps(self.summary()) + '\n')
+
+    def maybe_export(self):
+        if self.export_path is None:
+            return False
+        now = time.monotonic()
+        if now - self.last_export < self.export_interval:
+            return False
+        self.last_export = now
+        self.export()
+        return True
@@ -0,0 +1,75 @@
+import threading
+import time
+
+
+class FixedRateLoop:
+    """Calls ``callback`` at ``rate_hz`` on its own thread, with deadline tracking.
+
+    Ticks are scheduled on a fixed monotonic grid (no drift from the
+    callback's own run time). A tick that ends after the next one was due
+    counts as a deadline miss, and the ticks it overran are skipped instead
+    of being run back to back. ``lagging`` reports whether the latest tick
+    missed, so lower-priority work (rendering) can back off.
+    """
+
+    def __init__(self, callback, rate_hz=100, name='control-loop', profiler=None, stage='tick'):
+        self.callback = callback
+        self.period = 1.0 / rate_hz
+        self.name = name
+        self.profiler = profiler
+        self.stage = stage
+        self.iterations = 0
+        self.deadline_misses = 0
+        self.skipped_ticks = 0
+        self.errors = 0
+        self.last_lateness = 0.0
+        self.max_lateness = 0.0
+        self.missed_last = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def lagging(self):
+        return self.missed_last
+
+    def _run(self):
+        period = self.period
+        due = time.monotonic()
+        while not self._stop.is_set():
+            started = time.monotonic()
+            lateness = started - due
+            self.last_lateness = lateness
+            self.max_lateness = max(self.max_lateness, lateness)
+            try:
+                self.callback()
+            except Exception as e:
+                self.errors += 1
+                print(f"Error in {self.name}: {e}")
+            finished = time.monotonic()
+            self.iterations += 1
+            if self.profiler is not None:
+                self.profiler.record(self.stage, finished - started)
+
+            due += period
+            self.missed_last = finished > due
+            if self.missed_last:
+                overrun = int((finished - due) / period) + 1
+                self.deadline_misses += 1
+                self.skipped_ticks += overrun
+                due += overrun * period
+            self._stop.wait(max(0.0, due - time.monotonic()))